@@ -0,0 +1,205 @@
+"""Compact candle schema with interned symbols and timeframes
+
+Revision ID: 256689068aa7
+Revises: 49c91028241b
+Create Date: 2026-10-18 11:02:15.640921
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '256689068aa7'
+down_revision: Union[str, Sequence[str], None] = '49c91028241b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Fixed ids, mirrored by app.models.market_data.TIMEFRAME_IDS
+TIMEFRAMES = [(1, "1m"), (2, "5m"), (3, "15m"), (4, "30m"), (5, "1h"), (6, "4h"), (7, "1d")]
+
+CONTINUOUS_AGGREGATES = {
+    "market_candles_5m": "5 minutes",
+    "market_candles_15m": "15 minutes",
+    "market_candles_30m": "30 minutes",
+    "market_candles_1h": "1 hour",
+    "market_candles_4h": "4 hours",
+    "market_candles_1d": "1 day",
+}
+
+
+def _is_hypertable() -> bool:
+    bind = op.get_bind()
+    if bind.execute(sa.text("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")).scalar() is None:
+        return False
+    return bind.execute(sa.text(
+        "SELECT 1 FROM timescaledb_information.hypertables WHERE hypertable_name = 'market_candles'"
+    )).scalar() is not None
+
+
+def _drop_continuous_aggregates() -> None:
+    for view in CONTINUOUS_AGGREGATES:
+        op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {view}")
+
+
+def _make_hypertable(table: str, segment_by: str) -> None:
+    op.execute(f"""
+        SELECT create_hypertable('{table}', 'timestamp',
+            chunk_time_interval => INTERVAL '1 day',
+            create_default_indexes => FALSE
+        )
+    """)
+    op.execute(f"""
+        ALTER TABLE {table} SET (
+            timescaledb.compress,
+            timescaledb.compress_segmentby = '{segment_by}',
+            timescaledb.compress_orderby = 'timestamp DESC'
+        )
+    """)
+
+
+def _finish_timescale_setup(symbol_column: str, base_filter: str) -> None:
+    op.execute("SELECT add_compression_policy('market_candles', INTERVAL '7 days', if_not_exists => TRUE)")
+    for view, width in CONTINUOUS_AGGREGATES.items():
+        op.execute(f"""
+            CREATE MATERIALIZED VIEW {view}
+            WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+            SELECT
+                {symbol_column},
+                time_bucket(INTERVAL '{width}', timestamp) AS timestamp,
+                first(open, timestamp) AS open,
+                max(high) AS high,
+                min(low) AS low,
+                last(close, timestamp) AS close,
+                sum(volume) AS volume
+            FROM market_candles
+            WHERE {base_filter}
+            GROUP BY {symbol_column}, time_bucket(INTERVAL '{width}', timestamp)
+            WITH NO DATA
+        """)
+        op.execute(f"""
+            SELECT add_continuous_aggregate_policy('{view}',
+                start_offset => INTERVAL '8 days',
+                end_offset => INTERVAL '1 minute',
+                schedule_interval => INTERVAL '1 minute'
+            )
+        """)
+
+
+def _refresh_continuous_aggregates() -> None:
+    # The rebuilt views start empty and the policy only refreshes the last 8 days, so materialize
+    # the whole 1m history once. refresh_continuous_aggregate can't run inside a transaction.
+    with op.get_context().autocommit_block():
+        for view in CONTINUOUS_AGGREGATES:
+            op.execute(f"CALL refresh_continuous_aggregate('{view}', NULL, NULL)")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    hypertable = _is_hypertable()
+
+    op.create_table('market_symbols',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('symbol', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('symbol', name='uq_market_symbol')
+    )
+    timeframes = op.create_table('market_timeframes',
+    sa.Column('id', sa.SmallInteger(), autoincrement=False, nullable=False),
+    sa.Column('label', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('label', name='uq_market_timeframe')
+    )
+    op.bulk_insert(timeframes, [{"id": tf_id, "label": label} for tf_id, label in TIMEFRAMES])
+    op.execute("INSERT INTO market_symbols (symbol) SELECT DISTINCT symbol FROM market_candles ORDER BY symbol")
+
+    if hypertable:
+        _drop_continuous_aggregates()
+
+    # Rebuild into a new table: rewriting in place would touch every (possibly compressed) chunk twice
+    op.create_table('market_candles_compact',
+    sa.Column('symbol_id', sa.Integer(), sa.ForeignKey('market_symbols.id'), nullable=False),
+    sa.Column('timeframe_id', sa.SmallInteger(), sa.ForeignKey('market_timeframes.id'), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.Column('open', sa.Float(), nullable=False),
+    sa.Column('high', sa.Float(), nullable=False),
+    sa.Column('low', sa.Float(), nullable=False),
+    sa.Column('close', sa.Float(), nullable=False),
+    sa.Column('volume', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('symbol_id', 'timeframe_id', 'timestamp', name='market_candles_compact_pkey')
+    )
+    if hypertable:
+        _make_hypertable('market_candles_compact', 'symbol_id, timeframe_id')
+
+    op.execute("""
+        INSERT INTO market_candles_compact (symbol_id, timeframe_id, timestamp, open, high, low, close, volume)
+        SELECT s.id, t.id, c.timestamp, c.open, c.high, c.low, c.close, c.volume
+        FROM market_candles c
+        JOIN market_symbols s ON s.symbol = c.symbol
+        JOIN market_timeframes t ON t.label = COALESCE(c.timeframe, '1m')
+        ORDER BY s.id, t.id, c.timestamp
+    """)
+
+    op.drop_table('market_candles')
+    op.rename_table('market_candles_compact', 'market_candles')
+    op.execute("ALTER TABLE market_candles RENAME CONSTRAINT market_candles_compact_pkey TO market_candles_pkey")
+
+    if hypertable:
+        _finish_timescale_setup('symbol_id', 'timeframe_id = 1')
+    else:
+        # Physically order the heap by the composite key for range scans
+        op.execute("CLUSTER market_candles USING market_candles_pkey")
+
+    if hypertable:
+        _refresh_continuous_aggregates()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    hypertable = _is_hypertable()
+    if hypertable:
+        _drop_continuous_aggregates()
+
+    op.create_table('market_candles_wide',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('symbol', sa.String(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.Column('open', sa.Float(), nullable=False),
+    sa.Column('high', sa.Float(), nullable=False),
+    sa.Column('low', sa.Float(), nullable=False),
+    sa.Column('close', sa.Float(), nullable=False),
+    sa.Column('volume', sa.BigInteger(), nullable=False),
+    sa.Column('timeframe', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id', 'timestamp', name='market_candles_wide_pkey'),
+    sa.UniqueConstraint('symbol', 'timestamp', 'timeframe', name='uq_candle_wide')
+    )
+    if hypertable:
+        _make_hypertable('market_candles_wide', 'symbol, timeframe')
+
+    op.execute("""
+        INSERT INTO market_candles_wide (symbol, timestamp, open, high, low, close, volume, timeframe)
+        SELECT s.symbol, c.timestamp, c.open, c.high, c.low, c.close, c.volume, t.label
+        FROM market_candles c
+        JOIN market_symbols s ON s.id = c.symbol_id
+        JOIN market_timeframes t ON t.id = c.timeframe_id
+    """)
+
+    op.drop_table('market_candles')
+    op.rename_table('market_candles_wide', 'market_candles')
+    op.execute("ALTER TABLE market_candles RENAME CONSTRAINT market_candles_wide_pkey TO market_candles_pkey")
+    op.execute("ALTER TABLE market_candles RENAME CONSTRAINT uq_candle_wide TO uq_candle")
+    op.execute("ALTER SEQUENCE market_candles_wide_id_seq RENAME TO market_candles_id_seq")
+    op.create_index(op.f('ix_market_candles_id'), 'market_candles', ['id'], unique=False)
+    op.create_index(op.f('ix_market_candles_symbol'), 'market_candles', ['symbol'], unique=False)
+    op.create_index(op.f('ix_market_candles_timestamp'), 'market_candles', ['timestamp'], unique=False)
+
+    if hypertable:
+        _finish_timescale_setup('symbol', "timeframe = '1m'")
+
+    op.drop_table('market_timeframes')
+    op.drop_table('market_symbols')
+
+    if hypertable:
+        _refresh_continuous_aggregates()
@@ -0,0 +1,115 @@
+"""Market candles hypertable and continuous aggregates
+
+Revision ID: 49c91028241b
+Revises: ff89f9eb4529
+Create Date: 2026-10-18 09:12:40.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '49c91028241b'
+down_revision: Union[str, Sequence[str], None] = 'ff89f9eb4529'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Continuous aggregate view -> time_bucket width. Built from the 1m rows only.
+CONTINUOUS_AGGREGATES = {
+    "market_candles_5m": "5 minutes",
+    "market_candles_15m": "15 minutes",
+    "market_candles_30m": "30 minutes",
+    "market_candles_1h": "1 hour",
+    "market_candles_4h": "4 hours",
+    "market_candles_1d": "1 day",
+}
+
+
+def _timescale_available() -> bool:
+    bind = op.get_bind()
+    return bind.execute(
+        sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'timescaledb'")
+    ).scalar() is not None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Hypertables need every unique key to include the partitioning column
+    op.drop_constraint('market_candles_pkey', 'market_candles', type_='primary')
+    op.create_primary_key('market_candles_pkey', 'market_candles', ['id', 'timestamp'])
+
+    if not _timescale_available():
+        print("⚠️ timescaledb extension not available. Keeping market_candles as a plain table.")
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS timescaledb")
+    op.execute("""
+        SELECT create_hypertable(
+            'market_candles', 'timestamp',
+            chunk_time_interval => INTERVAL '1 day',
+            migrate_data => TRUE,
+            if_not_exists => TRUE
+        )
+    """)
+
+    # Native compression for chunks older than the 7-day 1m backfill horizon
+    op.execute("""
+        ALTER TABLE market_candles SET (
+            timescaledb.compress,
+            timescaledb.compress_segmentby = 'symbol, timeframe',
+            timescaledb.compress_orderby = 'timestamp DESC'
+        )
+    """)
+    op.execute("SELECT add_compression_policy('market_candles', INTERVAL '7 days', if_not_exists => TRUE)")
+
+    for view, width in CONTINUOUS_AGGREGATES.items():
+        op.execute(f"""
+            CREATE MATERIALIZED VIEW IF NOT EXISTS {view}
+            WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+            SELECT
+                symbol,
+                time_bucket(INTERVAL '{width}', timestamp) AS timestamp,
+                first(open, timestamp) AS open,
+                max(high) AS high,
+                min(low) AS low,
+                last(close, timestamp) AS close,
+                sum(volume) AS volume
+            FROM market_candles
+            WHERE timeframe = '1m'
+            GROUP BY symbol, time_bucket(INTERVAL '{width}', timestamp)
+            WITH NO DATA
+        """)
+        op.execute(f"""
+            SELECT add_continuous_aggregate_policy('{view}',
+                start_offset => INTERVAL '8 days',
+                end_offset => INTERVAL '1 minute',
+                schedule_interval => INTERVAL '1 minute',
+                if_not_exists => TRUE
+            )
+        """)
+
+    # The views are created empty and the policy only refreshes the last 8 days, so materialize
+    # the existing 1m history once. refresh_continuous_aggregate can't run inside a transaction.
+    with op.get_context().autocommit_block():
+        for view in CONTINUOUS_AGGREGATES:
+            op.execute(f"CALL refresh_continuous_aggregate('{view}', NULL, NULL)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if _timescale_available():
+        for view in CONTINUOUS_AGGREGATES:
+            op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {view}")
+        op.execute("SELECT remove_compression_policy('market_candles', if_exists => TRUE)")
+        op.execute("""
+            SELECT decompress_chunk(c, if_compressed => TRUE)
+            FROM show_chunks('market_candles') c
+        """)
+        # A hypertable cannot go back to a plain table in place, so it keeps the (id, timestamp) key
+        return
+
+    op.drop_constraint('market_candles_pkey', 'market_candles', type_='primary')
+    op.create_primary_key('market_candles_pkey', 'market_candles', ['id'])
@@ -12,6 +12,24 @@ class Settings(BaseSettings):
     ALPACA_SECRET_KEY: str
     ALPACA_BASE_URL: str = "https://paper-api.alpaca.markets"
 
+    # Candle storage: "table" resamples higher timeframes in Python and stores them as rows,
+    # "timescale" stores 1m only and reads higher timeframes from continuous aggregates
+    CANDLE_STORAGE: str = "table"
+
+    # Local Arrow candle cache used by the bot and the backtester
+    CANDLE_CACHE_DIR: str = "data/candle_cache"
+    CANDLE_CACHE_MAX_BYTES: int = 2 * 1024 ** 3
+
+    # Where scheduled jobs run: "embedded" in the API process (on a thread pool),
+    # "worker" only in the standalone `python -m app.worker` process
+    SCHEDULER_MODE: str = "embedded"
+
+    # Scheduler leader election (Postgres advisory lock): heartbeat and follower retry interval
+    LEADER_HEARTBEAT_SECONDS: int = 10
+
+    # Live price feed for tick-level SL/TP exits on the leader: "alpaca" or "none" (bar-close checks only)
+    EXIT_MONITOR_FEED: str = "alpaca"
+
     # This config tells Pydantic to look for a .env file if running locally,
     # but it will seamlessly use Docker's injected environment variables when in the container.
     model_config = SettingsConfigDict(
@@ -0,0 +1,90 @@
+# backend/app/core/leader.py
+import threading
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+from app.core.config import settings
+
+# Arbitrary app-wide key for pg_try_advisory_lock ("SKYROCKT" as ASCII)
+LEADER_LOCK_KEY = 0x534B59524F434B54
+
+# The lock lives on its own long-lived connection, outside the request pool.
+# TCP keepalives make Postgres notice a dead leader (and free the lock) within ~30s
+# even if its host vanished without closing the socket.
+_lock_engine = create_engine(
+    settings.DATABASE_URL,
+    poolclass=NullPool,
+    isolation_level="AUTOCOMMIT",
+    connect_args={"keepalives": 1, "keepalives_idle": 10, "keepalives_interval": 5, "keepalives_count": 3}
+)
+
+
+class LeaderElector:
+    """
+    Elects one leader across all API workers/replicas with a Postgres session-level advisory lock.
+    The leader pings its lock connection every heartbeat; followers retry the lock at the same rate.
+    When the leader dies its connection closes, Postgres drops the lock and a follower takes over.
+    """
+
+    def __init__(self, on_elected, on_demoted, heartbeat_seconds: float, lock_key: int = LEADER_LOCK_KEY):
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.heartbeat_seconds = heartbeat_seconds
+        self.lock_key = lock_key
+        self.is_leader = False
+        self._conn = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="leader-elector", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._set_leader(False)
+        # Closing the session releases the advisory lock for the next leader right away
+        self._close_connection()
+
+    def _run(self):
+        while True:
+            self._heartbeat()
+            if self._stop.wait(self.heartbeat_seconds):
+                return
+
+    def _heartbeat(self):
+        try:
+            if self._conn is None:
+                self._conn = _lock_engine.connect()
+
+            if self.is_leader:
+                self._conn.execute(text("SELECT 1"))
+            else:
+                acquired = self._conn.execute(
+                    text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key}
+                ).scalar()
+                if acquired:
+                    self._set_leader(True)
+        except Exception as e:
+            # Lost the lock connection: whatever lock we held is gone with it
+            print(f"⚠️ Leader election heartbeat failed: {e}")
+            self._close_connection()
+            self._set_leader(False)
+
+    def _set_leader(self, is_leader: bool):
+        if is_leader == self.is_leader:
+            return
+        self.is_leader = is_leader
+        if is_leader:
+            print("👑 Elected scheduler leader. Resuming scheduled jobs.")
+            self.on_elected()
+        else:
+            print("🪑 No longer scheduler leader. Pausing scheduled jobs.")
+            self.on_demoted()
+
+    def _close_connection(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
@@ -1,20 +1,15 @@
 # backend/app/main.py
 import os
-from datetime import datetime
-from pytz import timezone
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from huggingface_hub import login
 
+from app.core.config import settings
 from app.core.database import SessionLocal
-from app.routers import settings as settings_router, trades as trades_router
-
-# Import our native bot runner
-from app.services.bot.runner import run_bot_iteration
-
-scheduler = AsyncIOScheduler()
+from app.routers import settings as settings_router, trades as trades_router, backtest as backtest_router
+from app.scheduler import start_leader_scheduler, stop_leader_scheduler
+from app.services.bot.backtest_jobs import backtest_jobs
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -22,25 +17,23 @@ async def lifespan(app: FastAPI):
     hf_token = os.getenv("HF_TOKEN")
     if hf_token: login(token=hf_token)
 
-    ny_tz = timezone('America/New_York')
-
-    # 2. SCHEDULE THE TRADING BOT (Runs 24/7 every 15 minutes)
-    scheduler.add_job(
-        run_bot_iteration,
-        'cron',
-        minute='0,15,30,45',
-        timezone=ny_tz,
-        id='trading_bot_loop',
-        replace_existing=True
-    )
-
-    print("⏰ Schedulers Started!")
-    scheduler.start()
+    # 2. SCHEDULE THE TRADING BOT
+    # Jobs run on the scheduler's own thread pool so bot ticks never block request handling.
+    # Every uvicorn worker starts one, but only the elected leader actually fires jobs.
+    # In "worker" mode they run in the separate `python -m app.worker` process instead.
+    scheduler = None
+    if settings.SCHEDULER_MODE == "embedded":
+        scheduler, elector = start_leader_scheduler()
+        print("⏰ Schedulers Started! Waiting for leader election.")
+    else:
+        print("⏰ Scheduled jobs are handled by the worker process.")
     
     yield
     
-    print("🛑 App Shutdown: Stopping schedulers...")
-    scheduler.shutdown()
+    if scheduler:
+        print("🛑 App Shutdown: Stopping schedulers...")
+        stop_leader_scheduler(scheduler, elector)
+    backtest_jobs.shutdown()
 
 # APP INITIALIZATION
 PROJECT_NAME = os.getenv("PROJECT_NAME", "Skyrocket Trading Bot")
@@ -55,4 +48,5 @@ app.add_middleware(
 )
 
 app.include_router(settings_router.router)
-app.include_router(trades_router.router)
\ No newline at end of file
+app.include_router(trades_router.router)
+app.include_router(backtest_router.router)
\ No newline at end of file
@@ -0,0 +1,19 @@
+# backend/app/models/backtest_job.py
+from sqlalchemy import Column, String, Boolean, DateTime, JSON
+from app.core.database import Base
+
+class BacktestJobRecord(Base):
+    __tablename__ = "backtest_jobs"
+
+    # Shared by every API worker: any of them can answer polls for a job another one runs
+    job_id = Column(String, primary_key=True)
+    cache_key = Column(String, index=True, nullable=False)
+    ticker = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    cached = Column(Boolean, nullable=False, default=False)
+    error = Column(String, nullable=True)
+
+    # Finished payload; a 'done' row also serves as the cross-worker result cache for its cache_key
+    result = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,25 +1,42 @@
 # backend/app/models/market_data.py
-from sqlalchemy import Column, Integer, String, Float, DateTime, UniqueConstraint, BigInteger
+from sqlalchemy import Column, Integer, SmallInteger, String, Float, DateTime, BigInteger, ForeignKey
 from app.core.database import Base
 
+# Interned timeframe keys. Fixed ids, seeded by the compact candle schema migration.
+TIMEFRAME_IDS = {
+    "1m": 1,
+    "5m": 2,
+    "15m": 3,
+    "30m": 4,
+    "1h": 5,
+    "4h": 6,
+    "1d": 7
+}
+
+class MarketSymbol(Base):
+    __tablename__ = "market_symbols"
+
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String, unique=True, nullable=False)  # e.g., "AAPL"
+
+class MarketTimeframe(Base):
+    __tablename__ = "market_timeframes"
+
+    id = Column(SmallInteger, primary_key=True, autoincrement=False)
+    label = Column(String, unique=True, nullable=False)  # e.g., "1m", "1d"
+
 class MarketCandle(Base):
     __tablename__ = "market_candles"
 
-    id = Column(Integer, primary_key=True, index=True)
-    symbol = Column(String, index=True, nullable=False)  # e.g., "AAPL"
-    timestamp = Column(DateTime, index=True, nullable=False)
-    
+    # Composite key doubles as the only index: (symbol, timeframe, time) range scans
+    # are served straight from it, and it includes the hypertable time column.
+    symbol_id = Column(Integer, ForeignKey("market_symbols.id"), primary_key=True)
+    timeframe_id = Column(SmallInteger, ForeignKey("market_timeframes.id"), primary_key=True)
+    timestamp = Column(DateTime, primary_key=True)
+
     # OHLCV Data
     open = Column(Float, nullable=False)
     high = Column(Float, nullable=False)
     low = Column(Float, nullable=False)
     close = Column(Float, nullable=False)
     volume = Column(BigInteger, nullable=False)
-    
-    # Optional: Timeframe (e.g., "1m", "5m", "1d")
-    timeframe = Column(String, default="1m")
-
-    # Prevent duplicate candles for the same time/symbol
-    __table_args__ = (
-        UniqueConstraint('symbol', 'timestamp', 'timeframe', name='uq_candle'),
-    )
\ No newline at end of file
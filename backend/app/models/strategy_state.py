@@ -0,0 +1,15 @@
+# backend/app/models/strategy_state.py
+from sqlalchemy import Column, String, DateTime, JSON
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class StrategyCheckpoint(Base):
+    __tablename__ = "strategy_checkpoints"
+
+    # One live StrategyState per traded symbol
+    symbol = Column(String, primary_key=True)
+    state = Column(JSON, nullable=False)
+
+    # Newest bar already folded into 'state'; later ticks only apply bars after it
+    last_bar_time = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,79 @@
+# backend/app/routers/backtest.py
+import json
+import asyncio
+from typing import Literal
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.schemas import BacktestRequest, BacktestJobSchema
+from app.services.bot.backtest_jobs import backtest_jobs
+from app.services.bot.backtester import DEFAULT_PARAMS
+from app.services.downsample import DEFAULT_CHART_POINTS
+
+router = APIRouter(prefix="/api/backtest", tags=["backtest"])
+
+# How often the progress stream checks a running job
+EVENT_POLL_SECONDS = 0.5
+
+
+def _submit(request: BacktestRequest):
+    unknown = set(request.params) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown backtest params: {', '.join(sorted(unknown))}")
+    return backtest_jobs.submit(request.ticker, request.timeframe_mins, request.days_back, request.params,
+                                request.chart_points, request.chart_method, request.intrabar)
+
+
+def _get_job(job_id: str):
+    job = backtest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Backtest job not found")
+    return job
+
+
+@router.post("/jobs", response_model=BacktestJobSchema)
+def submit_backtest_job(request: BacktestRequest):
+    # Returns immediately; a cached or already-running identical request comes back as that job
+    return _submit(request).to_dict()
+
+
+@router.get("/jobs/{job_id}", response_model=BacktestJobSchema)
+def get_backtest_job(job_id: str):
+    return _get_job(job_id).to_dict()
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_backtest_job(job_id: str):
+    """Server-sent events: one message per stage change, the last one carries the result."""
+    job = await asyncio.to_thread(_get_job, job_id)
+
+    async def events():
+        nonlocal job
+        last_stage = None
+        while True:
+            # Re-read each time: a job run by another worker is a snapshot of its stored row
+            job = await asyncio.to_thread(backtest_jobs.get, job_id) or job
+            if job.stage != last_stage:
+                last_stage = job.stage
+                yield f"data: {json.dumps(job.to_dict(include_result=job.finished))}\n\n"
+            if job.finished:
+                return
+            await asyncio.sleep(EVENT_POLL_SECONDS)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@router.get("/{ticker}")
+async def run_backtest(ticker: str, timeframe_mins: int = Query(15, gt=0), days_back: int = Query(60, gt=0, le=3650),
+                       chart_points: int = Query(DEFAULT_CHART_POINTS, ge=3, le=100_000),
+                       chart_method: Literal["lttb", "minmax"] = "lttb", intrabar: bool = False):
+    """Submit and wait: the request awaits the job without holding a worker thread."""
+    request = BacktestRequest(ticker=ticker, timeframe_mins=timeframe_mins, days_back=days_back,
+                              chart_points=chart_points, chart_method=chart_method, intrabar=intrabar)
+    # Off the event loop: submitting writes the job's row
+    job = await asyncio.to_thread(_submit, request)
+    await asyncio.wrap_future(job.future)
+
+    if job.stage == "failed":
+        raise HTTPException(status_code=502, detail=f"Backtest failed: {job.error}")
+    return job.result
@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app.core.database import get_db
 from app.models.trade import Trade, TradeStatus
-from app.models.market_data import MarketCandle
+from app.models.market_data import MarketCandle, MarketSymbol, TIMEFRAME_IDS
 from app.schemas import TradeSchema, DashboardStats
 from typing import List
 
@@ -26,8 +26,12 @@ def get_dashboard_stats(db: Session = Depends(get_db)):
     total_val = 0
     for trade in active_trades:
         # Get latest price for the symbol
-        latest = db.query(MarketCandle.close).filter(
-            MarketCandle.symbol == trade.symbol
+        # Latest 1m close: a backwards walk of the (symbol_id, timeframe_id, timestamp) key
+        latest = db.query(MarketCandle.close).join(
+            MarketSymbol, MarketSymbol.id == MarketCandle.symbol_id
+        ).filter(
+            MarketSymbol.symbol == trade.symbol,
+            MarketCandle.timeframe_id == TIMEFRAME_IDS["1m"]
         ).order_by(MarketCandle.timestamp.desc()).first()
         
         price = latest[0] if latest else trade.entry_price
@@ -0,0 +1,94 @@
+# backend/app/scheduler.py
+from datetime import datetime
+from pytz import timezone
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from app.core.config import settings
+from app.core.leader import LeaderElector
+from app.services.bot.exit_monitor import exit_monitor, start_exit_monitor, stop_exit_monitor
+from app.services.bot.runner import run_bot_iteration
+
+# Jobs are plain blocking functions (Alpaca HTTP + SQLAlchemy), so they always run on
+# this thread pool and never on the API's event loop.
+JOB_WORKERS = 4
+
+JOB_DEFAULTS = {
+    "coalesce": True,           # A backlog of missed runs fires once, not N times
+    "max_instances": 1,         # Never overlap two ticks of the same job
+    "misfire_grace_time": 120
+}
+
+
+def register_jobs(scheduler):
+    """Adds every scheduled job. Shared by the embedded API scheduler and the standalone worker."""
+    ny_tz = timezone('America/New_York')
+
+    # SCHEDULE THE TRADING BOT (Runs 24/7 every 15 minutes)
+    scheduler.add_job(
+        run_bot_iteration,
+        'cron',
+        minute='0,15,30,45',
+        timezone=ny_tz,
+        id='trading_bot_loop',
+        replace_existing=True
+    )
+
+    # Re-read OPEN trades into the exit monitor's index (picks up trades opened/closed elsewhere)
+    scheduler.add_job(
+        exit_monitor.sync,
+        'interval',
+        minutes=1,
+        id='exit_monitor_sync',
+        replace_existing=True
+    )
+
+
+def create_scheduler() -> BackgroundScheduler:
+    """Background scheduler (own thread) with every job registered, not started."""
+    scheduler = BackgroundScheduler(
+        executors={"default": ThreadPoolExecutor(JOB_WORKERS)},
+        job_defaults=JOB_DEFAULTS
+    )
+    register_jobs(scheduler)
+    return scheduler
+
+
+def reschedule_from_now(scheduler):
+    """
+    Moves every job's next run to its first fire time from now. A paused follower keeps the
+    next_run_time it had when it was paused; resuming on that would re-fire (within the misfire
+    grace time) a tick the previous leader already ran, e.g. a second bot tick and order.
+    """
+    now = datetime.now(scheduler.timezone)
+    for job in scheduler.get_jobs():
+        job.modify(next_run_time=job.trigger.get_next_fire_time(None, now))
+
+
+def start_leader_scheduler() -> tuple:
+    """
+    Starts the scheduler paused in this process and lets leader election decide whether it runs.
+    Every API worker/replica can call this; only the advisory-lock holder fires jobs.
+    Returns (scheduler, elector) for stop_leader_scheduler.
+    """
+    scheduler = create_scheduler()
+    scheduler.start(paused=True)
+
+    # The leader also owns the live exit monitor, so exactly one process closes trades
+    def on_elected():
+        reschedule_from_now(scheduler)
+        scheduler.resume()
+        start_exit_monitor()
+
+    def on_demoted():
+        stop_exit_monitor()
+        scheduler.pause()
+
+    elector = LeaderElector(on_elected, on_demoted, settings.LEADER_HEARTBEAT_SECONDS)
+    elector.start()
+    return scheduler, elector
+
+
+def stop_leader_scheduler(scheduler: BackgroundScheduler, elector: LeaderElector):
+    elector.stop()
+    scheduler.shutdown()
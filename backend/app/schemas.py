@@ -1,7 +1,7 @@
 # backend/app/schemas.py
 from datetime import datetime
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Any, Dict, Literal, Optional, Union
 
 # Watchlist Schemas
 class WatchlistBase(BaseModel):
@@ -51,4 +51,24 @@ class TradeSchema(BaseModel):
 class DashboardStats(BaseModel):
     total_investment: float
     day_change_pct: float
-    yesterday_change_pct: float
\ No newline at end of file
+    yesterday_change_pct: float
+
+# Backtest Schemas
+class BacktestRequest(BaseModel):
+    ticker: str
+    timeframe_mins: int = Field(15, gt=0)
+    days_back: int = Field(60, gt=0, le=3650)
+    params: Dict[str, Union[float, bool]] = {}
+    chart_points: int = Field(1000, ge=3, le=100_000)
+    chart_method: Literal["lttb", "minmax"] = "lttb"
+    intrabar: bool = False
+
+class BacktestJobSchema(BaseModel):
+    job_id: str
+    ticker: str
+    status: str
+    progress: float
+    cached: bool
+    error: Optional[str] = None
+    elapsed_seconds: float
+    result: Optional[Dict[str, Any]] = None
@@ -0,0 +1,154 @@
+# backend/app/services/bot/backtest_data.py
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta, timezone
+from app.core.database import SessionLocal
+from app.services.bot.data_fetcher import fetch_crypto_bars, load_cached_bars
+from app.services.market_data import _to_naive_utc, _upsert_candles, df_to_rows, is_crypto, iter_candle_chunks
+
+# Bot timeframes (minutes) that market_candles keeps, by their stored label
+STORE_TIMEFRAMES = {
+    1: "1m",
+    5: "5m",
+    15: "15m",
+    30: "30m",
+    60: "1h",
+    240: "4h",
+    1440: "1d"
+}
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+# Holes inside the stored range shorter than this many bars are quiet periods, not missing data
+GAP_TOLERANCE_BARS = 5
+
+# Ranges already requested from Alpaca per (symbol, timeframe). Alpaca has no bars for quiet stretches
+# of illiquid pairs, so those holes stay in the store; they are only asked for once per process.
+MAX_FETCHED_RANGES = 1024
+_fetched_ranges = {}
+
+
+def bot_symbol(ticker: str) -> str:
+    # Tickers from the UI/URL can't carry a "/" ("BTC-USD" -> "BTC/USD"). market_candles, like the
+    # watchlist and the bot, keys symbols by that Alpaca form, so it is used as-is from here on.
+    return ticker.upper().replace("-", "/")
+
+
+def read_store_bars(symbol: str, timeframe: str, start: pd.Timestamp, end: pd.Timestamp, db=None) -> pd.DataFrame:
+    """
+    One ordered range scan of market_candles, streamed chunk by chunk into column arrays.
+    Returns lowercase OHLCV columns on a UTC index, like fetch_crypto_bars.
+    """
+    owns_session = db is None
+    db = db or SessionLocal()
+    try:
+        chunks = list(iter_candle_chunks(db, symbol, timeframe, _to_naive_utc(start), _to_naive_utc(end)))
+    finally:
+        if owns_session:
+            db.close()
+
+    if not chunks:
+        return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], tz="UTC"))
+
+    # Concatenate per column instead of per frame: one array per field, no intermediate frames
+    index = pd.DatetimeIndex(np.concatenate([chunk.index.to_numpy() for chunk in chunks])).tz_localize("UTC")
+    columns = {
+        name.lower(): np.concatenate([chunk[name].to_numpy(dtype="float64") for chunk in chunks])
+        for name in ("Open", "High", "Low", "Close", "Volume")
+    }
+    return pd.DataFrame(columns, index=index)
+
+
+def _missing_ranges(stored: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp, bar: timedelta) -> list:
+    if stored.empty:
+        return [(start, end)]
+
+    ranges = []
+    # Head: requested range starts before the store does
+    if stored.index[0] - start > bar:
+        ranges.append((start, stored.index[0]))
+    # Holes between stored bars (e.g. a gap left by an earlier partial fetch)
+    gaps = np.flatnonzero(np.diff(stored.index.as_unit("ns").asi8) > pd.Timedelta(bar * GAP_TOLERANCE_BARS).value)
+    for i in gaps:
+        ranges.append((stored.index[i] + bar, stored.index[i + 1]))
+    # Tail: re-fetch from the last stored bar, which may have been captured while still forming
+    if end - stored.index[-1] > bar:
+        ranges.append((stored.index[-1], end))
+    return ranges
+
+
+def _not_fetched(symbol: str, timeframe: str, ranges: list) -> list:
+    fetched = _fetched_ranges.get((symbol, timeframe), [])
+    return [
+        (start, end) for start, end in ranges
+        if not any(done_start <= start and end <= done_end for done_start, done_end in fetched)
+    ]
+
+
+def _mark_fetched(symbol: str, timeframe: str, ranges: list):
+    fetched = _fetched_ranges.setdefault((symbol, timeframe), [])
+    fetched.extend(ranges)
+    del fetched[:-MAX_FETCHED_RANGES]
+
+
+def _persist_bars(db, symbol: str, timeframe: str, bars: pd.DataFrame):
+    frame = bars[OHLCV_COLUMNS].rename(columns=str.capitalize)
+    rows = df_to_rows(frame, symbol, timeframe)
+    if rows:
+        _upsert_candles(db, rows, symbol, timeframe)
+        db.commit()
+
+
+def load_backtest_bars(symbol: str, timeframe_mins: int, start: datetime, end: datetime = None) -> pd.DataFrame:
+    """
+    Backtest bars for [start, end) served from market_candles. Only the ranges the store doesn't
+    cover (head, tail and internal holes) are fetched from Alpaca, each at most once per process,
+    and those bars are written back at the requested timeframe, so repeating a backtest never
+    touches the network. Non-crypto symbols (stocks kept by the watchlist job) are served from the
+    store only. Timeframes the store doesn't keep use the Arrow cache.
+    """
+    timeframe = STORE_TIMEFRAMES.get(timeframe_mins)
+    if timeframe is None:
+        return load_cached_bars(symbol, timeframe_mins, start, end)
+
+    start = pd.Timestamp(start)
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp(datetime.now(timezone.utc))
+    start = start.tz_localize("UTC") if start.tz is None else start
+    end = end.tz_localize("UTC") if end.tz is None else end
+
+    db = SessionLocal()
+    try:
+        stored = read_store_bars(symbol, timeframe, start, end, db)
+        if not is_crypto(symbol):
+            # Alpaca's crypto API can't serve it, and its gaps are mostly market closures anyway
+            return stored
+
+        missing = _missing_ranges(stored, start, end, timedelta(minutes=timeframe_mins))
+        missing = _not_fetched(symbol, timeframe, missing)
+        if not missing:
+            return stored
+
+        print(f"📥 Fetching {len(missing)} missing {timeframe} range(s) for {symbol} from Alpaca...")
+        try:
+            fetched = [fetch_crypto_bars(symbol, timeframe_mins, range_start, range_end) for range_start, range_end in missing]
+        except Exception as e:
+            if stored.empty:
+                raise
+            print(f"⚠️ Remote fetch for {symbol} failed, using stored bars only: {e}")
+            return stored
+        _mark_fetched(symbol, timeframe, missing)
+        fetched = [df for df in fetched if not df.empty]
+        if not fetched:
+            return stored
+
+        new_bars = pd.concat(fetched)
+        new_bars = new_bars[~new_bars.index.duplicated(keep="last")].sort_index()
+        # Stored natively even in timescale mode: 1m rows written here would mostly fall outside the
+        # continuous aggregates' refresh window and never be materialized. The read serves native
+        # rows wherever the aggregate has no bucket.
+        _persist_bars(db, symbol, timeframe, new_bars)
+
+        # Read back through the store so aggregated timeframes and fresh rows line up exactly
+        return read_store_bars(symbol, timeframe, start, end, db)
+    finally:
+        db.close()
@@ -0,0 +1,460 @@
+# backend/app/services/bot/backtest_engine.py
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+from app.services.bot.state_manager import StrategyState
+
+# Vectorized HA fakeout backtest. Produces the same trades as backtester.simulate_reference,
+# but evaluates 4h ranges, breakout arming, extremes and entry signals as array operations
+# and only steps in Python from one entry/exit event to the next.
+#
+# Bars inside a trade are skipped by the strategy state, so the state after a trade depends on
+# the path. That dependency only reaches to the second 4h boundary after a trade or risk-filter
+# reset: from there on ranges and trap flags equal a "free run" over all bars, precomputed once.
+
+# WARMUP: no entries before the 100th candle, same as the reference loop
+WARMUP_CANDLES = 100
+
+# First window searched for a trade's exit; doubled until the exit is found
+EXIT_CHUNK = 128
+
+
+class BarArrays:
+    """Column arrays of one HA-annotated bar frame, built once and reused by every simulation."""
+
+    # Everything a simulation reads; exported as-is to shared memory for sweep workers
+    ARRAY_FIELDS = (
+        "open", "high", "low", "close", "ha_open", "ha_close",
+        "is_boundary", "ha_green", "ha_red", "boundaries", "timestamp_ns"
+    )
+
+    def __init__(self, df):
+        self.tz = df.index.tz
+        self.timestamp_ns = df.index.as_unit("ns").asi8
+        self.open = df['open'].to_numpy(dtype="float64")
+        self.high = df['high'].to_numpy(dtype="float64")
+        self.low = df['low'].to_numpy(dtype="float64")
+        self.close = df['close'].to_numpy(dtype="float64")
+        self.ha_open = df['HA_Open'].to_numpy(dtype="float64")
+        self.ha_close = df['HA_Close'].to_numpy(dtype="float64")
+
+        self.is_boundary = np.asarray((df.index.hour % 4 == 0) & (df.index.minute == 0))
+        self.ha_green = self.ha_close > self.ha_open
+        self.ha_red = self.ha_close < self.ha_open
+        self.size = len(df)
+
+        self.boundaries = np.flatnonzero(self.is_boundary)
+        self._free_run = None
+
+    def timestamp(self, i: int) -> pd.Timestamp:
+        # Much cheaper than DatetimeIndex.__getitem__ when called once per trade
+        return pd.Timestamp(self.timestamp_ns[i], tz=self.tz)
+
+    def to_shared_memory(self) -> tuple:
+        """
+        Copies every array (free run included) into one shared memory block.
+        Returns (shm, layout); the caller owns shm and must close() and unlink() it.
+        """
+        arrays = {name: getattr(self, name) for name in self.ARRAY_FIELDS}
+        arrays.update({f"free_run.{key}": value for key, value in self.free_run().items()})
+
+        layout, offset = {}, 0
+        for name, array in arrays.items():
+            layout[name] = (offset, array.dtype.str, array.shape)
+            offset += -(-array.nbytes // 8) * 8  # keep every array 8-byte aligned
+
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 8))
+        for name, array in arrays.items():
+            start, dtype, shape = layout[name]
+            np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)[...] = array
+
+        return shm, {"arrays": layout, "tz": str(self.tz) if self.tz is not None else None, "size": self.size}
+
+    @classmethod
+    def from_shared_memory(cls, shm: shared_memory.SharedMemory, layout: dict) -> "BarArrays":
+        """Read-only BarArrays whose arrays are views into 'shm' (no copy). Keep shm open while in use."""
+        bars = cls.__new__(cls)
+        views = {}
+        for name, (start, dtype, shape) in layout["arrays"].items():
+            view = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+            view.flags.writeable = False
+            views[name] = view
+
+        for name in cls.ARRAY_FIELDS:
+            setattr(bars, name, views[name])
+        bars.tz = layout["tz"]
+        bars.size = layout["size"]
+        bars._free_run = {
+            name.split(".", 1)[1]: view for name, view in views.items() if name.startswith("free_run.")
+        }
+        return bars
+
+    def settle_bar(self, start: int) -> int:
+        """Second 4h boundary at or after 'start' (or the end): where the free run takes over again."""
+        p = np.searchsorted(self.boundaries, start)
+        return int(self.boundaries[p + 1]) if p + 1 < len(self.boundaries) else self.size
+
+    def free_run(self) -> dict:
+        """
+        Ranges, trap extremes and entry candidates of an uninterrupted run over every bar.
+        Param independent, so computed once per BarArrays and shared by all simulations.
+        """
+        if self._free_run is not None:
+            return self._free_run
+
+        n = self.size
+        range_high = np.full(n, np.nan)
+        range_low = np.full(n, np.nan)
+        if len(self.boundaries) >= 2:
+            # Group k (from the k-th boundary) trades against group k-1; the partial first group has no range
+            group = np.cumsum(self.is_boundary)
+            group_high = np.concatenate(([np.nan, np.nan], np.maximum.reduceat(self.high, self.boundaries)[:-1]))
+            group_low = np.concatenate(([np.nan, np.nan], np.minimum.reduceat(self.low, self.boundaries)[:-1]))
+            range_high, range_low = group_high[group], group_low[group]
+        range_ok = ~np.isnan(range_high) & ~np.isnan(range_low)
+
+        broke_up = range_ok & (self.ha_close > range_high)
+        broke_down = range_ok & (self.ha_close < range_low)
+        last_boundary = _last_true(self.is_boundary)
+        set_up, set_down = _last_true(broke_up), _last_true(broke_down)
+        is_up = (set_up >= 0) & (set_up >= np.maximum(set_down, last_boundary))
+        is_down = (set_down >= 0) & (set_down >= np.maximum(set_up, last_boundary))
+
+        # Extremes run from the bar that armed the flag
+        was_up = np.concatenate(([False], is_up[:-1])) & ~self.is_boundary
+        was_down = np.concatenate(([False], is_down[:-1])) & ~self.is_boundary
+        ext_high = pd.Series(self.high).groupby(np.cumsum(broke_up & ~was_up)).cummax().to_numpy()
+        ext_low = pd.Series(self.low).groupby(np.cumsum(broke_down & ~was_down)).cummin().to_numpy()
+
+        warm = np.arange(n) >= WARMUP_CANDLES - 1
+        go_long = warm & range_ok & is_down & (self.ha_close > range_low) & self.ha_green
+        go_short = warm & range_ok & is_up & (self.ha_close < range_high) & self.ha_red
+        candidates = np.flatnonzero(go_long | go_short)
+        is_long = go_long[candidates]
+
+        self._free_run = {
+            'range_high': range_high,
+            'range_low': range_low,
+            'last_boundary': last_boundary,
+            'candidates': candidates,
+            'is_long': is_long,
+            'sl_price': np.where(is_long, ext_low[candidates], ext_high[candidates])
+        }
+        return self._free_run
+
+
+class SubBarIndex:
+    """
+    1m sub-bars of a BarArrays series for intrabar fills. Base bar i covers sub-bars
+    [start[i], stop[i]), found for every bar with two searchsorted calls up front,
+    so each lookup during a simulation is O(1).
+    """
+
+    def __init__(self, bars: BarArrays, sub_df, timeframe_mins: int):
+        sub_ns = sub_df.index.as_unit("ns").asi8
+        self.high = sub_df['high'].to_numpy(dtype="float64")
+        self.low = sub_df['low'].to_numpy(dtype="float64")
+        self.start = np.searchsorted(sub_ns, bars.timestamp_ns)
+        self.stop = np.searchsorted(sub_ns, bars.timestamp_ns + timeframe_mins * 60 * 10**9)
+
+    def slice(self, i: int) -> tuple:
+        a, b = self.start[i], self.stop[i]
+        return self.high[a:b], self.low[a:b]
+
+
+def _nan(value) -> float:
+    return np.nan if value is None else value
+
+
+def _value(x):
+    return None if np.isnan(x) else float(x)
+
+
+def _last_true(mask: np.ndarray, positions: np.ndarray = None) -> np.ndarray:
+    """Index of the latest True at or before each position, -1 before the first."""
+    if positions is None:
+        positions = np.arange(len(mask))
+    return np.maximum.accumulate(np.where(mask, positions, -1))
+
+
+def _scan_flat(bars: BarArrays, start: int, stop: int, state: StrategyState, params: dict):
+    """
+    Replays StrategyState.update_state + check_for_signals over bars [start, stop) with no open trade,
+    starting from a 'state' with its trap flags cleared (fresh, or right after an entry or reset).
+    Returns the first actionable signal as (kind, bar, side, sl, tp, risk) with kind "entry"
+    or "reset" (risk filter), and advances 'state' to that bar with the trap flags cleared.
+    Returns None (state untouched) if there is none. Meant for short windows (a couple of 4h groups).
+    """
+    high = bars.high[start:stop]
+    low = bars.low[start:stop]
+    ha_close = bars.ha_close[start:stop]
+    n = stop - start
+    positions = np.arange(n)
+
+    boundary = bars.is_boundary[start:stop]
+    boundaries = bars.boundaries[np.searchsorted(bars.boundaries, start):np.searchsorted(bars.boundaries, stop)] - start
+    carry_high, carry_low = _nan(state.current_4h_high), _nan(state.current_4h_low)
+
+    # --- 4h ranges: each boundary promotes the previous 4h high/low (carried into the first group) ---
+    range_high, range_low = _nan(state.range_high), _nan(state.range_low)
+    rh = np.full(n, range_high)
+    rl = np.full(n, range_low)
+    group_start = None
+    for b in boundaries:
+        if group_start is None:
+            prev_high = np.fmax(carry_high, high[:b].max()) if b else carry_high
+            prev_low = np.fmin(carry_low, low[:b].min()) if b else carry_low
+        else:
+            prev_high, prev_low = high[group_start:b].max(), low[group_start:b].min()
+        # Without any 4h values yet (very first boundary) the range is kept
+        if not np.isnan(prev_high):
+            range_high, range_low = prev_high, prev_low
+        rh[b:], rl[b:] = range_high, range_low
+        group_start = b
+
+    # --- Breakout arming: a flag is on if its last trigger is not older than the last opposite trigger/boundary ---
+    # (NaN ranges compare False, which covers "no range yet")
+    broke_up = ha_close > rh
+    broke_down = ha_close < rl
+    last_boundary = _last_true(boundary, positions)
+    set_up, set_down = _last_true(broke_up, positions), _last_true(broke_down, positions)
+    clear_up = np.maximum(np.maximum(set_down, last_boundary), 0)
+    clear_down = np.maximum(np.maximum(set_up, last_boundary), 0)
+    is_up = set_up >= clear_up
+    is_down = set_down >= clear_down
+
+    # --- Entry signals (check_for_signals), after warmup ---
+    go_long = is_down & (ha_close > rl) & bars.ha_green[start:stop]
+    go_short = is_up & (ha_close < rh) & bars.ha_red[start:stop]
+    signals = np.flatnonzero(go_long | go_short)
+    if start < WARMUP_CANDLES - 1:
+        signals = signals[signals >= WARMUP_CANDLES - 1 - start]
+
+    close = bars.close[start:stop]
+    for j in signals:
+        if go_long[j]:
+            side = "LONG"
+            armed = clear_down[j] + np.argmax(broke_down[clear_down[j]:j + 1])
+            sl_price = float(low[armed:j + 1].min())
+            risk_amount = close[j] - sl_price
+            tp_price = close[j] + (risk_amount * params['rr_ratio'])
+        else:
+            side = "SHORT"
+            armed = clear_up[j] + np.argmax(broke_up[clear_up[j]:j + 1])
+            sl_price = float(high[armed:j + 1].max())
+            risk_amount = sl_price - close[j]
+            tp_price = close[j] - (risk_amount * params['rr_ratio'])
+
+        if risk_amount <= 0:
+            continue
+
+        # Entry and the max-risk filter both clear the trap flags
+        last = last_boundary[j]
+        if last >= 0:
+            state.current_4h_high = float(high[last:j + 1].max())
+            state.current_4h_low = float(low[last:j + 1].min())
+        else:
+            state.current_4h_high = float(np.fmax(carry_high, high[:j + 1].max()))
+            state.current_4h_low = float(np.fmin(carry_low, low[:j + 1].min()))
+        state.range_high, state.range_low = _value(rh[j]), _value(rl[j])
+        state.is_outside_up = state.is_outside_down = False
+        state.ext_high = state.ext_low = None
+
+        risk_pct = (risk_amount / close[j]) * 100
+        kind = "reset" if risk_pct > params['max_risk_pct'] else "entry"
+        return kind, start + j, side, sl_price, tp_price, risk_amount
+
+    return None
+
+
+def _exit_levels(high: np.ndarray, low: np.ndarray, side: str, entry: float, watermark: float, sl: float,
+                 tp: float, trail_start: float, trail_offset: float, use_trailing: bool) -> tuple:
+    """Per-bar watermark, (trailing) stop and SL/TP hit masks over consecutive bars, as the reference updates them."""
+    if side == "LONG":
+        marks = np.maximum(watermark, np.maximum.accumulate(high))
+        stops = np.full(len(marks), sl)
+        if use_trailing:
+            # The reference only trails when the watermark actually moves past the entry
+            trail = np.where((marks > entry) & (marks >= entry + trail_start), marks - trail_offset, -np.inf)
+            stops = np.maximum(sl, np.maximum.accumulate(trail))
+        return marks, stops, low <= stops, high >= tp
+
+    marks = np.minimum(watermark, np.minimum.accumulate(low))
+    stops = np.full(len(marks), sl)
+    if use_trailing:
+        trail = np.where((marks < entry) & (marks <= entry - trail_start), marks + trail_offset, np.inf)
+        stops = np.minimum(sl, np.minimum.accumulate(trail))
+    return marks, stops, high >= stops, low <= tp
+
+
+def _find_exit(bars: BarArrays, start: int, side: str, entry: float, sl: float, tp: float,
+               trail_start: float, trail_offset: float, use_trailing: bool, sub_bars: "SubBarIndex" = None):
+    """
+    First bar at or after 'start' where the (trailing) SL or the TP is hit, as (bar, exit_price),
+    or None if the trade is still open at the end of the data. SL wins ties, like the reference loop.
+    With 'sub_bars', bars where the order of events is ambiguous are replayed on their 1m sub-bars.
+    """
+    levels = (side, entry)
+    trail = (trail_start, trail_offset, use_trailing)
+    window = EXIT_CHUNK
+    watermark = entry
+    while start < bars.size:
+        stop = min(bars.size, start + window)
+        marks, stops, hit_sl, hit_tp = _exit_levels(bars.high[start:stop], bars.low[start:stop], *levels, watermark, sl, tp, *trail)
+        hit = hit_sl | hit_tp
+
+        for k in np.flatnonzero(hit):
+            prev_mark = marks[k - 1] if k else watermark
+            prev_stop = stops[k - 1] if k else sl
+            if sub_bars is not None:
+                # Ambiguous: both levels inside the bar, or a stop only hit after this bar's own extreme raised it
+                plain_sl = (bars.low[start + k] <= prev_stop) if side == "LONG" else (bars.high[start + k] >= prev_stop)
+                if (hit_sl[k] and hit_tp[k]) or (hit_sl[k] and not plain_sl):
+                    sub_high, sub_low = sub_bars.slice(start + k)
+                    _, sub_stops, sub_sl, sub_tp = _exit_levels(sub_high, sub_low, *levels, prev_mark, prev_stop, tp, *trail)
+                    sub_hit = sub_sl | sub_tp
+                    if sub_hit.any():
+                        m = int(np.argmax(sub_hit))
+                        return start + int(k), (sub_stops[m] if sub_sl[m] else tp)
+                    if not (plain_sl or hit_tp[k]):
+                        continue  # The low came before the high: the raised stop survives this bar
+            return start + int(k), (stops[k] if hit_sl[k] else tp)
+
+        watermark, sl = marks[-1], stops[-1]
+        start = stop
+        window *= 2
+
+    return None
+
+
+def _free_run_entries(bars: BarArrays, params: dict) -> dict:
+    """Free-run candidates with positive risk, with their SL/TP and whether the risk filter rejects them."""
+    free = bars.free_run()
+    candidates, is_long, sl_price = free['candidates'], free['is_long'], free['sl_price']
+    close = bars.close[candidates]
+    risk_amount = np.where(is_long, close - sl_price, sl_price - close)
+
+    live = risk_amount > 0
+    candidates, is_long, sl_price, close, risk_amount = (
+        candidates[live], is_long[live], sl_price[live], close[live], risk_amount[live]
+    )
+    return {
+        'bars': candidates,
+        'is_long': is_long,
+        'sl_price': sl_price,
+        'tp_price': np.where(is_long, close + (risk_amount * params['rr_ratio']), close - (risk_amount * params['rr_ratio'])),
+        'risk_amount': risk_amount,
+        'rejected': (risk_amount / close) * 100 > params['max_risk_pct']
+    }
+
+
+def _free_run_event(bars: BarArrays, entries: dict, start: int, state: StrategyState):
+    """First free-run entry/reset at or after 'start', with 'state' set to that bar (flags cleared)."""
+    p = np.searchsorted(entries['bars'], start)
+    if p == len(entries['bars']):
+        return None
+
+    j = int(entries['bars'][p])
+    free = bars.free_run()
+    last = free['last_boundary'][j]
+    state.range_high, state.range_low = float(free['range_high'][j]), float(free['range_low'][j])
+    state.current_4h_high = float(bars.high[last:j + 1].max())
+    state.current_4h_low = float(bars.low[last:j + 1].min())
+    state.is_outside_up = state.is_outside_down = False
+    state.ext_high = state.ext_low = None
+
+    kind = "reset" if entries['rejected'][p] else "entry"
+    side = "LONG" if entries['is_long'][p] else "SHORT"
+    return kind, j, side, entries['sl_price'][p], entries['tp_price'][p], entries['risk_amount'][p]
+
+
+def trade_events(bars: BarArrays, params: dict, sub_bars: "SubBarIndex" = None, start: int = 0, stop: int = None):
+    """
+    Yields every trade as (entry_bar, exit_bar, side, entry_price, exit_price, risk_amount).
+    Sizing never feeds back into the signals, so the sequence doesn't depend on capital.
+    [start, stop) limits the run to a window of bars (fresh strategy state at 'start', trades
+    still open at 'stop' dropped) while HA and free-run arrays stay those of the full series.
+    """
+    stop = bars.size if stop is None else stop
+    state = StrategyState()
+    entries = _free_run_entries(bars, params)
+
+    i = start
+    while i < stop:
+        # Path-dependent stretch first, then jump straight to the next free-run event
+        settle = bars.settle_bar(i)
+        event = _scan_flat(bars, i, min(settle, stop), state, params)
+        if event is None and settle < stop:
+            event = _free_run_event(bars, entries, settle, state)
+        if event is None or event[1] >= stop:
+            return
+
+        kind, j, side, sl_price, tp_price, risk_amount = event
+        if kind == "reset":
+            i = j + 1
+            continue
+
+        entry = bars.close[j]
+        exit_ = _find_exit(
+            bars, j + 1, side, entry, sl_price, tp_price,
+            risk_amount * params['trail_start_r'], risk_amount * params['trail_offset_r'], params['use_trailing'],
+            sub_bars
+        )
+        if exit_ is None or exit_[0] >= stop:
+            return  # Still open when the data ends, same as the reference loop
+
+        k, exit_price = exit_
+        yield j, k, side, entry, exit_price, risk_amount
+        i = k + 1
+
+
+def simulate_vectorized(bars: BarArrays, params: dict, sub_bars: "SubBarIndex" = None,
+                        start: int = 0, stop: int = None) -> tuple:
+    """
+    Runs the strategy over 'bars' (or the window [start, stop), see trade_events). Returns (trade_history, final_capital).
+    'sub_bars' switches on intrabar mode: ambiguous exit bars are resolved on 1m data instead of assuming the SL.
+    """
+    capital = params['initial_capital']
+    trade_history = []
+
+    for j, k, side, entry, exit_price, risk_amount in trade_events(bars, params, sub_bars, start, stop):
+        qty = (capital * params['trade_risk_pct']) / risk_amount
+        if side == 'LONG':
+            profit = (exit_price - entry) * qty
+        else:
+            profit = (entry - exit_price) * qty
+
+        capital += profit
+        trade_history.append({
+            'side': side,
+            'entry_time': bars.timestamp(j),
+            'exit_time': bars.timestamp(k),
+            'entry_price': float(entry),
+            'exit_price': float(exit_price),
+            'profit': float(profit),
+            'result': 'WIN' if profit > 0 else 'LOSS'
+        })
+
+    return trade_history, capital
+
+
+def summarize_trades(trade_history: list, capital: float, initial_capital: float) -> dict:
+    """Headline stats for one simulation (the BacktestResult summary plus drawdown and profit factor)."""
+    profits = np.array([trade['profit'] for trade in trade_history], dtype="float64")
+    wins = int((profits > 0).sum())
+
+    equity = initial_capital + np.cumsum(np.concatenate(([0.0], profits)))
+    peaks = np.maximum.accumulate(equity)
+    gross_loss = -profits[profits <= 0].sum()
+
+    return {
+        'total_trades': len(trade_history),
+        'wins': wins,
+        'losses': len(trade_history) - wins,
+        'win_rate': (wins / len(trade_history) * 100) if trade_history else 0,
+        'initial_balance': initial_capital,
+        'final_balance': float(capital),
+        'total_return_pct': float((capital - initial_capital) / initial_capital * 100),
+        'max_drawdown_pct': float(((peaks - equity) / peaks).max() * 100),
+        'profit_factor': float(profits[profits > 0].sum() / gross_loss) if gross_loss > 0 else None
+    }
@@ -0,0 +1,328 @@
+# backend/app/services/bot/backtest_jobs.py
+import json
+import time
+import uuid
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+
+from app.core.database import SessionLocal
+from app.models.backtest_job import BacktestJobRecord
+from app.services.bot.backtest_data import bot_symbol, load_backtest_bars
+from app.services.bot.backtest_engine import BarArrays, SubBarIndex, simulate_vectorized, summarize_trades
+from app.services.bot.backtester import DEFAULT_PARAMS
+from app.services.bot.indicators import calculate_heikin_ashi
+from app.services.bot.monte_carlo import run_monte_carlo
+from app.services.bot.process_pool import process_pool
+from app.services.downsample import DEFAULT_CHART_POINTS, downsample_indices
+
+# Concurrent jobs: each holds one runner thread (data loading) and one simulation process
+BACKTEST_WORKERS = 2
+
+# Finished results kept in memory, keyed by cache_key (least recently used evicted first)
+RESULT_CACHE_SIZE = 64
+
+# Finished job records kept for polling before the oldest are dropped
+MAX_FINISHED_JOBS = 256
+
+# Finished rows kept in backtest_jobs (job polling from other workers and the shared result cache)
+JOB_RETENTION = timedelta(days=1)
+
+# Bump when the simulation or result shape changes so cached results are recomputed
+ENGINE_VERSION = 3
+
+# Fixed Monte Carlo seed so a cached result and a recomputed one agree
+MONTE_CARLO_SEED = 0
+
+# Job stages in order, with the progress fraction reported for each
+STAGES = {
+    "queued": 0.0,
+    "loading_data": 0.1,
+    "simulating": 0.5,
+    "done": 1.0,
+    "failed": 1.0
+}
+
+
+def cache_key(symbol: str, timeframe_mins: int, start: pd.Timestamp, end: pd.Timestamp, params: dict,
+              chart: dict, intrabar: bool) -> str:
+    """
+    Hash of everything a result depends on. The data range ends on the last closed bar, so the
+    key (and the cached result) only changes once a new bar can exist in the store.
+    """
+    payload = json.dumps({
+        "symbol": symbol,
+        "timeframe_mins": timeframe_mins,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "params": params,
+        "chart": chart,
+        "intrabar": intrabar,
+        "engine": ENGINE_VERSION
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def chart_points(df: pd.DataFrame, trade_history: list, chart: dict) -> list:
+    """Close series downsampled to about chart['points'] points, keeping every trade's entry/exit bar."""
+    marker_times = pd.DatetimeIndex([trade[field] for trade in trade_history for field in ('entry_time', 'exit_time')])
+    keep = df.index.get_indexer(marker_times) if len(marker_times) else None
+
+    x = df.index.asi8 // 10**9
+    points = downsample_indices(x, df['close'].to_numpy(), chart['points'], keep=keep, method=chart['method'])
+    sampled = df.iloc[points]
+    return [
+        {'time': time_str, 'price': price}
+        for time_str, price in zip(sampled.index.strftime("%Y-%m-%dT%H:%M:%SZ"), sampled['close'].tolist())
+    ]
+
+
+def build_result(ticker: str, df: pd.DataFrame, trade_history: list, capital: float, initial_capital: float,
+                 chart: dict) -> dict:
+    """BacktestResult payload as the frontend expects it (src/services/backtestApi.ts)."""
+    return {
+        'ticker': ticker,
+        'summary': summarize_trades(trade_history, capital, initial_capital),
+        'trades': [
+            {**trade, 'entry_time': trade['entry_time'].isoformat(), 'exit_time': trade['exit_time'].isoformat()}
+            for trade in trade_history
+        ],
+        'chart_data': chart_points(df, trade_history, chart),
+        'monte_carlo': run_monte_carlo(trade_history, initial_capital, seed=MONTE_CARLO_SEED)
+    }
+
+
+def simulate_job(raw_df: pd.DataFrame, ticker: str, params: dict, chart: dict, timeframe_mins: int,
+                 sub_df: pd.DataFrame = None) -> dict:
+    """Runs in a pool process: HA, vectorized simulation and result payload for one job."""
+    df = calculate_heikin_ashi(raw_df)
+    bars = BarArrays(df)
+    sub_bars = SubBarIndex(bars, sub_df, timeframe_mins) if sub_df is not None else None
+    trade_history, capital = simulate_vectorized(bars, params, sub_bars)
+    return build_result(ticker, df, trade_history, capital, params['initial_capital'], chart)
+
+
+class BacktestJob:
+    def __init__(self, job_id: str, key: str, ticker: str, timeframe_mins: int, start: pd.Timestamp,
+                 end: pd.Timestamp, params: dict, chart: dict, intrabar: bool):
+        self.job_id = job_id
+        self.key = key
+        self.ticker = ticker
+        self.timeframe_mins = timeframe_mins
+        self.start = start
+        self.end = end
+        self.params = params
+        self.chart = chart
+        self.intrabar = intrabar
+        self.stage = "queued"
+        self.cached = False
+        self.error = None
+        self.result = None
+        self.created_at = time.time()
+        self.finished_at = None
+        # Resolves (never raises) once the job is done or failed; await it with asyncio.wrap_future
+        self.future = Future()
+
+    @classmethod
+    def from_record(cls, record: BacktestJobRecord) -> "BacktestJob":
+        """Read-only snapshot of a job stored by another API worker."""
+        job = cls(record.job_id, record.cache_key, record.ticker, None, None, None, None, None, False)
+        job.stage = record.status
+        job.cached = record.cached
+        job.error = record.error
+        job.result = record.result
+        job.created_at = record.created_at.timestamp()
+        job.finished_at = record.finished_at.timestamp() if record.finished_at else None
+        if job.finished:
+            job.future.set_result(job)
+        return job
+
+    @property
+    def finished(self) -> bool:
+        return self.stage in ("done", "failed")
+
+    def to_dict(self, include_result: bool = True) -> dict:
+        elapsed_until = self.finished_at or time.time()
+        return {
+            'job_id': self.job_id,
+            'ticker': self.ticker,
+            'status': self.stage,
+            'progress': STAGES[self.stage],
+            'cached': self.cached,
+            'error': self.error,
+            'elapsed_seconds': round(elapsed_until - self.created_at, 3),
+            'result': self.result if include_result else None
+        }
+
+
+class BacktestJobService:
+    """
+    Backtest jobs off the request path: a runner thread loads bars (DB first, Alpaca only for
+    gaps) and hands the simulation to a process pool, so long runs never hold the event loop or the GIL.
+    Identical requests share one in-flight job, and finished results are served from an LRU cache.
+    Every job is also written to backtest_jobs, so any API worker can answer polls for it and
+    reuse its result; only the in-flight dedup is per worker.
+    """
+
+    def __init__(self, workers: int = BACKTEST_WORKERS):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._in_flight = {}
+        self._results = OrderedDict()
+        self._runner = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backtest-job")
+        self._pool = None
+
+    def submit(self, ticker: str, timeframe_mins: int, days_back: int, params: dict = None,
+               chart_points: int = DEFAULT_CHART_POINTS, chart_method: str = "lttb",
+               intrabar: bool = False) -> BacktestJob:
+        ticker = ticker.upper()
+        params = {**DEFAULT_PARAMS, **(params or {})}
+        chart = {'points': chart_points, 'method': chart_method}
+        end = pd.Timestamp.now(tz="UTC").floor(f"{timeframe_mins}min")
+        start = end - timedelta(days=days_back)
+        key = cache_key(bot_symbol(ticker), timeframe_mins, start, end, params, chart, intrabar)
+
+        with self._lock:
+            if key in self._in_flight:
+                return self._in_flight[key]
+
+            job = BacktestJob(uuid.uuid4().hex, key, ticker, timeframe_mins, start, end, params, chart, intrabar)
+            self._jobs[job.job_id] = job
+
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                job.cached = True
+                self._finish(job, "done", result=result)
+            else:
+                self._in_flight[key] = job
+
+        self._store(job)
+        if not job.finished:
+            self._runner.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> BacktestJob:
+        """The job, whether this worker runs it or another one stored it. None if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+
+        db = SessionLocal()
+        try:
+            record = db.get(BacktestJobRecord, job_id)
+        finally:
+            db.close()
+        return BacktestJob.from_record(record) if record is not None else None
+
+    def _stored_result(self, key: str) -> dict:
+        """Newest finished result for this cache key from any worker, or None."""
+        db = SessionLocal()
+        try:
+            record = db.query(BacktestJobRecord.result).filter(
+                BacktestJobRecord.cache_key == key, BacktestJobRecord.status == "done"
+            ).order_by(BacktestJobRecord.finished_at.desc()).first()
+        finally:
+            db.close()
+        return record.result if record is not None else None
+
+    def _store(self, job: BacktestJob):
+        """Upserts the job's row and prunes expired finished rows. A failed write only costs cross-worker visibility."""
+        db = SessionLocal()
+        try:
+            db.merge(BacktestJobRecord(
+                job_id=job.job_id,
+                cache_key=job.key,
+                ticker=job.ticker,
+                status=job.stage,
+                cached=job.cached,
+                error=job.error,
+                result=job.result,
+                created_at=datetime.fromtimestamp(job.created_at, timezone.utc),
+                finished_at=datetime.fromtimestamp(job.finished_at, timezone.utc) if job.finished_at else None
+            ))
+            if job.finished:
+                db.query(BacktestJobRecord).filter(
+                    BacktestJobRecord.finished_at < datetime.now(timezone.utc) - JOB_RETENTION
+                ).delete(synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Could not store backtest job {job.job_id}: {e}")
+        finally:
+            db.close()
+
+    def _run(self, job: BacktestJob):
+        try:
+            # Another worker may already have computed this exact request
+            result = self._stored_result(job.key)
+            if result is not None:
+                job.cached = True
+                self._complete(job, result)
+                return
+
+            job.stage = "loading_data"
+            self._store(job)
+            raw_df = load_backtest_bars(bot_symbol(job.ticker), job.timeframe_mins, job.start, job.end)
+            if raw_df.empty:
+                raise ValueError(f"No {job.timeframe_mins}m candle data for {job.ticker}")
+
+            sub_df = None
+            if job.intrabar and job.timeframe_mins > 1:
+                sub_df = load_backtest_bars(bot_symbol(job.ticker), 1, job.start, job.end)
+
+            job.stage = "simulating"
+            self._store(job)
+            result = self._get_pool().submit(
+                simulate_job, raw_df, job.ticker, job.params, job.chart, job.timeframe_mins, sub_df
+            ).result()
+        except Exception as e:
+            print(f"❌ Backtest job {job.job_id} ({job.ticker}) failed: {e}")
+            with self._lock:
+                self._in_flight.pop(job.key, None)
+                self._finish(job, "failed", error=str(e))
+            self._store(job)
+            return
+
+        self._complete(job, result)
+        print(f"✅ Backtest job {job.job_id} ({job.ticker}) finished in {job.finished_at - job.created_at:.1f}s")
+
+    def _complete(self, job: BacktestJob, result: dict):
+        with self._lock:
+            self._in_flight.pop(job.key, None)
+            self._results[job.key] = result
+            while len(self._results) > RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+            self._finish(job, "done", result=result)
+        self._store(job)
+
+    def _finish(self, job: BacktestJob, stage: str, result: dict = None, error: str = None):
+        """Marks a job finished and drops the oldest finished records. Caller holds the lock."""
+        job.result, job.error = result, error
+        job.finished_at = time.time()
+        job.stage = stage
+        job.future.set_result(job)
+
+        finished = [job_id for job_id, record in self._jobs.items() if record.finished]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Created on first use so importing the API never spawns processes
+        with self._lock:
+            if self._pool is None:
+                self._pool = process_pool(self.workers)
+            return self._pool
+
+    def shutdown(self):
+        self._runner.shutdown(wait=False, cancel_futures=True)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+backtest_jobs = BacktestJobService()
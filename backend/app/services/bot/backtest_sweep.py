@@ -0,0 +1,97 @@
+# backend/app/services/bot/backtest_sweep.py
+import os
+import time
+import itertools
+from datetime import datetime, timedelta, timezone
+from multiprocessing import shared_memory
+import pandas as pd
+
+# Project Imports
+from app.services.bot.backtest_engine import BarArrays, simulate_vectorized, summarize_trades
+from app.services.bot.backtester import DEFAULT_PARAMS, SYMBOL, TIMEFRAME_MINS, DAYS_BACK
+from app.services.bot.backtest_data import load_backtest_bars
+from app.services.bot.indicators import calculate_heikin_ashi
+from app.services.bot.process_pool import process_pool
+
+# Example grid for running this file directly (4 * 3 * 3 * 3 * 2 = 216 runs)
+EXAMPLE_GRID = {
+    'rr_ratio': [1.5, 2.0, 2.5, 3.0],
+    'max_risk_pct': [0.3, 0.5, 1.0],
+    'trail_start_r': [0.5, 1.0, 1.5],
+    'trail_offset_r': [0.25, 0.5, 1.0],
+    'timeframe_mins': [15, 30]
+}
+
+# Worker-side: bar sets attached once per process, keyed by timeframe
+worker_bars = {}
+_worker_segments = []
+
+
+def attach_shared_bars(layouts: dict):
+    """Process pool initializer: maps every timeframe's shared block into this worker (no copy)."""
+    for timeframe_mins, (shm_name, layout) in layouts.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _worker_segments.append(shm)  # keep the mapping alive for the life of the worker
+        worker_bars[timeframe_mins] = BarArrays.from_shared_memory(shm, layout)
+
+
+def _run_combo(combo: dict) -> dict:
+    params = {**DEFAULT_PARAMS, **combo}
+    trade_history, capital = simulate_vectorized(worker_bars[combo['timeframe_mins']], params)
+    return {**combo, **summarize_trades(trade_history, capital, params['initial_capital'])}
+
+
+def expand_grid(grid: dict) -> list:
+    """{'rr_ratio': [1.5, 2.0], ...} -> one params dict per combination."""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+
+def load_sweep_bars(symbol: str, timeframe_mins: int, days_back: int) -> BarArrays:
+    end_date = datetime.now(timezone.utc)
+    raw_df = load_backtest_bars(symbol, timeframe_mins, end_date - timedelta(days=days_back), end_date)
+    if raw_df.empty:
+        raise ValueError(f"No {timeframe_mins}m data for {symbol}")
+    return BarArrays(calculate_heikin_ashi(raw_df))
+
+
+def run_sweep(grid: dict, symbol: str = SYMBOL, days_back: int = DAYS_BACK,
+              workers: int = None, rank_by: str = "total_return_pct") -> pd.DataFrame:
+    """
+    Backtests every combination of 'grid' (any DEFAULT_PARAMS key, plus 'timeframe_mins').
+    HA and range arrays are built once per timeframe, placed in shared memory and mapped by
+    every worker of a process pool. Returns one row per run, best 'rank_by' first.
+    """
+    combos = [{'timeframe_mins': TIMEFRAME_MINS, **combo} for combo in expand_grid(grid)]
+    timeframes = sorted({combo['timeframe_mins'] for combo in combos})
+    workers = workers or os.cpu_count() or 1
+
+    segments = []
+    try:
+        layouts = {}
+        for timeframe_mins in timeframes:
+            print(f"📥 Preparing {days_back} days of {timeframe_mins}m bars for {symbol}...")
+            shm, layout = load_sweep_bars(symbol, timeframe_mins, days_back).to_shared_memory()
+            segments.append(shm)
+            layouts[timeframe_mins] = (shm.name, layout)
+
+        print(f"🧪 Sweeping {len(combos)} combinations on {workers} workers...")
+        started = time.perf_counter()
+        with process_pool(workers, initializer=attach_shared_bars, initargs=(layouts,)) as pool:
+            chunksize = max(1, len(combos) // (workers * 4))
+            rows = list(pool.map(_run_combo, combos, chunksize=chunksize))
+        print(f"⏱️ Sweep finished in {time.perf_counter() - started:.1f}s")
+    finally:
+        for shm in segments:
+            shm.close()
+            shm.unlink()
+
+    results = pd.DataFrame(rows).sort_values(rank_by, ascending=False, na_position="last")
+    results.insert(0, 'rank', range(1, len(results) + 1))
+    return results.reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    table = run_sweep(EXAMPLE_GRID)
+    with pd.option_context("display.max_columns", None, "display.width", 200):
+        print(table.head(20).to_string(index=False))
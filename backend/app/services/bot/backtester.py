@@ -1,20 +1,18 @@
 # backend/app/services/bot/backtester.py
-import pandas as pd
 import os
 import sys
+import time
 from datetime import datetime, timedelta, timezone
 
-# Alpaca Imports
-from alpaca.data.historical import CryptoHistoricalDataClient
-from alpaca.data.requests import CryptoBarsRequest
-from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
-
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
 
 # Project Imports
-from app.core.config import settings
-from state_manager import StrategyState
-from strategy_logic import check_for_signals
+from app.services.bot.backtest_data import load_backtest_bars
+from app.services.bot.indicators import calculate_heikin_ashi
+from app.services.bot.backtest_engine import BarArrays, SubBarIndex, simulate_vectorized
+from app.services.bot.monte_carlo import run_monte_carlo
+from app.services.bot.state_manager import StrategyState
+from app.services.bot.strategy_logic import check_for_signals
 
 # --- BACKTEST PARAMETERS ---
 SYMBOL = "BTC/USD"  # Changed to Alpaca's crypto format
@@ -24,66 +22,34 @@ MAX_RISK_PCT = 0.5
 RR_RATIO = 2.0
 INITIAL_CAPITAL = 1000.0
 TRADE_RISK_PCT = 0.02  
+INTRABAR = False    # Resolve bars where SL and TP are both touched on 1m sub-bars (vectorized engine only)
 
 # --- TRAILING STOP PARAMETERS ---
 USE_TRAILING = True
 TRAIL_START_R = 1.0   
 TRAIL_OFFSET_R = 0.5  
 
-# Initialize Alpaca Client using your config credentials
-data_client = CryptoHistoricalDataClient(settings.ALPACA_API_KEY, settings.ALPACA_SECRET_KEY)
-
-def calculate_heikin_ashi(df: pd.DataFrame) -> pd.DataFrame:
-    """Matches the exact lowercase column format returned by Alpaca."""
-    ha_df = df.copy()
-    ha_df['HA_Close'] = (df['open'] + df['high'] + df['low'] + df['close']) / 4
-    
-    ha_open = [df['open'].iloc[0]]
-    for i in range(1, len(df)):
-        ha_open.append((ha_open[i-1] + ha_df['HA_Close'].iloc[i-1]) / 2)
-    ha_df['HA_Open'] = ha_open
-    
-    ha_df['HA_High'] = ha_df[['high', 'HA_Open', 'HA_Close']].max(axis=1)
-    ha_df['HA_Low'] = ha_df[['low', 'HA_Open', 'HA_Close']].min(axis=1)
-    return ha_df
-
-def run_backtest():
-    print(f"📥 Fetching {DAYS_BACK} days of {TIMEFRAME_MINS}m data for {SYMBOL} from Alpaca...")
-    end_date = datetime.now(timezone.utc)
-    start_date = end_date - timedelta(days=DAYS_BACK)
-    
-    request_params = CryptoBarsRequest(
-        symbol_or_symbols=SYMBOL,
-        timeframe=TimeFrame(TIMEFRAME_MINS, TimeFrameUnit.Minute),
-        start=start_date,
-        end=end_date
-    )
-    
-    try:
-        bars = data_client.get_crypto_bars(request_params)
-        raw_df = bars.df
-        
-        if raw_df.empty:
-            print("❌ Alpaca returned empty data.")
-            return
-            
-    except Exception as e:
-        print(f"❌ Failed to fetch data from Alpaca: {e}")
-        return
-
-    # Alpaca returns a MultiIndex (symbol, timestamp). We drop the symbol to easily iterate by time.
-    if isinstance(raw_df.index, pd.MultiIndex):
-        raw_df = raw_df.reset_index(level=0, drop=True)
-
-    df = calculate_heikin_ashi(raw_df)
-    
+DEFAULT_PARAMS = {
+    'max_risk_pct': MAX_RISK_PCT,
+    'rr_ratio': RR_RATIO,
+    'initial_capital': INITIAL_CAPITAL,
+    'trade_risk_pct': TRADE_RISK_PCT,
+    'use_trailing': USE_TRAILING,
+    'trail_start_r': TRAIL_START_R,
+    'trail_offset_r': TRAIL_OFFSET_R
+}
+
+def simulate_reference(df, params: dict = None) -> tuple:
+    """
+    Candle-by-candle reference simulation over an HA-annotated frame.
+    Returns (trade_history, final_capital). backtest_engine.simulate_vectorized must match it exactly.
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
     bot_state = StrategyState()
     
-    capital = INITIAL_CAPITAL
+    capital = params['initial_capital']
     open_trade = None
     trade_history = []
-    
-    print("🤖 Simulating Strategy...")
 
     # WARMUP COUNTER: Skip trading for the first 100 candles to let HA math stabilize
     warmup_candles = 100
@@ -108,7 +74,7 @@ def run_backtest():
                 if candle['high'] > open_trade['high_watermark']:
                     open_trade['high_watermark'] = candle['high']
                     
-                    if USE_TRAILING and (open_trade['high_watermark'] >= open_trade['entry'] + open_trade['trail_start']):
+                    if params['use_trailing'] and (open_trade['high_watermark'] >= open_trade['entry'] + open_trade['trail_start']):
                         new_sl = open_trade['high_watermark'] - open_trade['trail_offset']
                         if new_sl > open_trade['sl']:
                             open_trade['sl'] = new_sl 
@@ -124,7 +90,7 @@ def run_backtest():
                 if candle['low'] < open_trade['low_watermark']:
                     open_trade['low_watermark'] = candle['low']
                     
-                    if USE_TRAILING and (open_trade['low_watermark'] <= open_trade['entry'] - open_trade['trail_start']):
+                    if params['use_trailing'] and (open_trade['low_watermark'] <= open_trade['entry'] - open_trade['trail_start']):
                         new_sl = open_trade['low_watermark'] + open_trade['trail_offset']
                         if new_sl < open_trade['sl']:
                             open_trade['sl'] = new_sl 
@@ -147,7 +113,9 @@ def run_backtest():
                     'side': open_trade['side'],
                     'entry_time': open_trade['entry_time'],
                     'exit_time': timestamp,
-                    'profit': profit,
+                    'entry_price': float(open_trade['entry']),
+                    'exit_price': float(exit_price),
+                    'profit': float(profit),
                     'result': 'WIN' if profit > 0 else 'LOSS' 
                 })
                 open_trade = None 
@@ -170,21 +138,21 @@ def run_backtest():
             if signal == "LONG":
                 risk_amount = real_close - bot_state.ext_low
                 sl_price = bot_state.ext_low
-                tp_price = real_close + (risk_amount * RR_RATIO)
+                tp_price = real_close + (risk_amount * params['rr_ratio'])
             else: 
                 risk_amount = bot_state.ext_high - real_close
                 sl_price = bot_state.ext_high
-                tp_price = real_close - (risk_amount * RR_RATIO)
+                tp_price = real_close - (risk_amount * params['rr_ratio'])
 
             if risk_amount <= 0: continue
             
             risk_pct = (risk_amount / real_close) * 100
-            if risk_pct > MAX_RISK_PCT:
+            if risk_pct > params['max_risk_pct']:
                 bot_state.is_outside_down = False
                 bot_state.is_outside_up = False
                 continue
 
-            qty = (capital * TRADE_RISK_PCT) / risk_amount
+            qty = (capital * params['trade_risk_pct']) / risk_amount
             
             open_trade = {
                 'side': signal,
@@ -195,13 +163,50 @@ def run_backtest():
                 'entry_time': timestamp,
                 'high_watermark': real_close,
                 'low_watermark': real_close,
-                'trail_start': risk_amount * TRAIL_START_R,
-                'trail_offset': risk_amount * TRAIL_OFFSET_R
+                'trail_start': risk_amount * params['trail_start_r'],
+                'trail_offset': risk_amount * params['trail_offset_r']
             }
             
             bot_state.is_outside_down = False
             bot_state.is_outside_up = False
 
+    return trade_history, capital
+
+def run_backtest(engine: str = "vectorized", intrabar: bool = INTRABAR):
+    print(f"📥 Loading {DAYS_BACK} days of {TIMEFRAME_MINS}m data for {SYMBOL}...")
+    end_date = datetime.now(timezone.utc)
+    start_date = end_date - timedelta(days=DAYS_BACK)
+    
+    try:
+        # Served from market_candles; only ranges the store is missing hit Alpaca (and get stored)
+        raw_df = load_backtest_bars(SYMBOL, TIMEFRAME_MINS, start_date, end_date)
+        
+        if raw_df.empty:
+            print("❌ No candle data in the store or from Alpaca.")
+            return
+            
+    except Exception as e:
+        print(f"❌ Failed to load candle data: {e}")
+        return
+
+    df = calculate_heikin_ashi(raw_df)
+    bars = BarArrays(df)
+
+    sub_bars = None
+    if intrabar and engine != "reference":
+        try:
+            sub_bars = SubBarIndex(bars, load_backtest_bars(SYMBOL, 1, start_date, end_date), TIMEFRAME_MINS)
+        except Exception as e:
+            print(f"⚠️ No 1m sub-bars, falling back to bar-level fills: {e}")
+    
+    print(f"🤖 Simulating Strategy ({engine} engine)...")
+    started = time.perf_counter()
+    if engine == "reference":
+        trade_history, capital = simulate_reference(df, DEFAULT_PARAMS)
+    else:
+        trade_history, capital = simulate_vectorized(bars, DEFAULT_PARAMS, sub_bars)
+    print(f"⏱️ Simulated {len(df)} candles in {time.perf_counter() - started:.3f}s")
+
     # --- PRINT RESULTS ---
     wins = [t for t in trade_history if t['result'] == 'WIN']
     losses = [t for t in trade_history if t['result'] == 'LOSS']
@@ -219,5 +224,14 @@ def run_backtest():
     print(f"Total Return: {total_return:.2f}%")
     print("="*40)
 
+    mc = run_monte_carlo(trade_history, INITIAL_CAPITAL)
+    if mc:
+        print(f"🎲 MONTE CARLO ({mc['paths']:,} {mc['method']} paths)")
+        print(f"Return p5/p50/p95:   {mc['total_return_pct']['p5']:.2f}% / {mc['total_return_pct']['p50']:.2f}% / {mc['total_return_pct']['p95']:.2f}%")
+        print(f"Max DD p50/p95:      {mc['max_drawdown_pct']['p50']:.2f}% / {mc['max_drawdown_pct']['p95']:.2f}%")
+        print(f"Chance of Loss:      {mc['probability_of_loss'] * 100:.2f}%")
+        print(f"Risk of Ruin (-{mc['ruin_loss_pct']:.0f}%): {mc['risk_of_ruin'] * 100:.2f}%")
+        print("="*40)
+
 if __name__ == "__main__":
     run_backtest()
\ No newline at end of file
@@ -0,0 +1,70 @@
+# backend/app/services/bot/broker.py
+import threading
+import time
+from alpaca.trading.client import TradingClient
+from alpaca.trading.requests import GetOrdersRequest
+from alpaca.trading.enums import QueryOrderStatus
+from app.core.config import settings
+
+trading_client = TradingClient(settings.ALPACA_API_KEY, settings.ALPACA_SECRET_KEY, paper=True)
+
+# How long one broker snapshot may be served before it is refetched.
+# The runner also invalidates it at the start of every tick.
+SNAPSHOT_TTL_SECONDS = 30
+
+
+class BrokerSnapshot:
+    """
+    Positions, account equity and open orders fetched together and served from memory,
+    so a tick over many symbols costs three broker round-trips instead of several per symbol.
+    Call invalidate() after submitting an order so the next read sees its effect.
+    """
+
+    def __init__(self, client: TradingClient, ttl: float):
+        self.client = client
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._fetched_at = None
+        self._positions = {}
+        self._orders = {}
+        self._equity = 0.0
+
+    def _refresh(self):
+        positions = self.client.get_all_positions()
+        account = self.client.get_account()
+        orders = self.client.get_orders(GetOrdersRequest(status=QueryOrderStatus.OPEN))
+
+        # Alpaca reports crypto positions without the slash ("BTCUSD"); key orders the same way
+        self._positions = {pos.symbol: pos for pos in positions}
+        self._orders = {}
+        for order in orders:
+            self._orders.setdefault(order.symbol.replace("/", ""), []).append(order)
+        self._equity = float(account.equity)
+        self._fetched_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        # Held across the refresh so concurrent symbol jobs wait for one fetch instead of all fetching
+        with self._lock:
+            if self._fetched_at is None or time.monotonic() - self._fetched_at > self.ttl:
+                self._refresh()
+
+    def invalidate(self):
+        with self._lock:
+            self._fetched_at = None
+
+    def position(self, symbol: str):
+        """The open position for 'BTC/USD' or 'BTCUSD', or None."""
+        self._ensure_fresh()
+        return self._positions.get(symbol.replace("/", ""))
+
+    def open_orders(self, symbol: str) -> list:
+        """Orders for 'BTC/USD' or 'BTCUSD' that are not filled, cancelled or expired yet."""
+        self._ensure_fresh()
+        return list(self._orders.get(symbol.replace("/", ""), []))
+
+    def equity(self) -> float:
+        self._ensure_fresh()
+        return self._equity
+
+
+broker_snapshot = BrokerSnapshot(trading_client, SNAPSHOT_TTL_SECONDS)
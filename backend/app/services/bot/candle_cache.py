@@ -0,0 +1,133 @@
+# backend/app/services/bot/candle_cache.py
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+import pandas as pd
+import pyarrow as pa
+from app.core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+# Local columnar OHLCV cache: one Arrow IPC file per symbol/timeframe/month.
+#   {root}/{BTC_USD}/{15m}/{2024-05}.arrow
+# Files are uncompressed IPC so reads are memory-mapped instead of parsed.
+PARTITION_SUFFIX = ".arrow"
+
+# Per-series lock file: API workers, the worker process and backtest jobs all write the same cache
+LOCK_FILE = ".lock"
+
+
+class CandleCache:
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _series_dir(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root, symbol.replace("/", "_"), timeframe)
+
+    def _partitions(self, symbol: str, timeframe: str) -> list:
+        """Sorted (month, path) pairs for one series."""
+        series_dir = self._series_dir(symbol, timeframe)
+        if not os.path.isdir(series_dir):
+            return []
+        return sorted(
+            (name[:-len(PARTITION_SUFFIX)], os.path.join(series_dir, name))
+            for name in os.listdir(series_dir) if name.endswith(PARTITION_SUFFIX)
+        )
+
+    @staticmethod
+    @contextmanager
+    def _series_lock(series_dir: str):
+        """Exclusive cross-process lock on one series for the read-merge-write of its partitions."""
+        with open(os.path.join(series_dir, LOCK_FILE), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _read_partition(path: str) -> pd.DataFrame:
+        with pa.memory_map(path, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        return table.to_pandas().set_index("timestamp")
+
+    def read(self, symbol: str, timeframe: str, start: pd.Timestamp = None, end: pd.Timestamp = None) -> pd.DataFrame:
+        """Returns cached bars in [start, end) (UTC) indexed by timestamp, or an empty frame."""
+        first_month = start.strftime("%Y-%m") if start is not None else None
+        last_month = end.strftime("%Y-%m") if end is not None else None
+
+        frames = [
+            self._read_partition(path)
+            for month, path in self._partitions(symbol, timeframe)
+            if (first_month is None or month >= first_month) and (last_month is None or month <= last_month)
+        ]
+        if not frames:
+            return pd.DataFrame()
+
+        df = pd.concat(frames)
+        if start is not None:
+            df = df[df.index >= start]
+        if end is not None:
+            df = df[df.index < end]
+        return df
+
+    def append(self, symbol: str, timeframe: str, df: pd.DataFrame):
+        """Merges new bars into their month partitions (new rows win) and enforces the size budget."""
+        if df.empty:
+            return
+
+        series_dir = self._series_dir(symbol, timeframe)
+        os.makedirs(series_dir, exist_ok=True)
+
+        with self._lock, self._series_lock(series_dir):
+            for month, new_rows in df.groupby(df.index.strftime("%Y-%m")):
+                path = os.path.join(series_dir, f"{month}{PARTITION_SUFFIX}")
+                if os.path.exists(path):
+                    merged = pd.concat([self._read_partition(path), new_rows])
+                    new_rows = merged[~merged.index.duplicated(keep="last")]
+                new_rows = new_rows.sort_index()
+
+                table = pa.Table.from_pandas(new_rows.rename_axis("timestamp").reset_index(), preserve_index=False)
+                # Unique temp file in the same directory, then an atomic swap so readers never map a half-written file
+                fd, tmp_path = tempfile.mkstemp(dir=series_dir, suffix=".tmp")
+                os.close(fd)
+                try:
+                    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table)
+                    os.replace(tmp_path, path)
+                except BaseException:
+                    os.remove(tmp_path)
+                    raise
+
+            self._evict()
+
+    def _evict(self):
+        """Deletes the oldest month partitions (across all series) until the cache fits its budget."""
+        files = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(PARTITION_SUFFIX):
+                    path = os.path.join(dirpath, name)
+                    files.append((name, os.path.getmtime(path), os.path.getsize(path), path))
+
+        total = sum(size for _, _, size, _ in files)
+        for _, _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Already evicted by another process
+            total -= size
+            print(f"🧹 Evicted cache partition {path}")
+
+
+candle_cache = CandleCache(settings.CANDLE_CACHE_DIR, settings.CANDLE_CACHE_MAX_BYTES)
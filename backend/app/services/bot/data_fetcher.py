@@ -5,37 +5,94 @@ from alpaca.data.historical import CryptoHistoricalDataClient
 from alpaca.data.requests import CryptoBarsRequest
 from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
 from app.core.config import settings
+from app.services.bot.candle_cache import candle_cache
+from app.services.bot.indicators import calculate_heikin_ashi, extend_heikin_ashi
 
 # Initialize Alpaca Data Client
 data_client = CryptoHistoricalDataClient(settings.ALPACA_API_KEY, settings.ALPACA_SECRET_KEY)
 
-def calculate_heikin_ashi(df: pd.DataFrame) -> pd.DataFrame:
-    ha_df = df.copy()
-    ha_df['HA_Close'] = (df['open'] + df['high'] + df['low'] + df['close']) / 4
-    
-    ha_open = [df['open'].iloc[0]]
-    for i in range(1, len(df)):
-        ha_open.append((ha_open[i-1] + ha_df['HA_Close'].iloc[i-1]) / 2)
-    ha_df['HA_Open'] = ha_open
-    
-    ha_df['HA_High'] = ha_df[['high', 'HA_Open', 'HA_Close']].max(axis=1)
-    ha_df['HA_Low'] = ha_df[['low', 'HA_Open', 'HA_Close']].min(axis=1)
-    
-    return ha_df
+TIMEFRAME_MINS = 15
+LOOKBACK = timedelta(days=4)
 
-def get_latest_data(symbol: str) -> pd.DataFrame:
+# Last fetched window (bars + HA columns) per symbol, kept between scheduler ticks
+_latest_windows = {}
+
+def fetch_crypto_bars(symbol: str, timeframe_mins: int, start: datetime, end: datetime = None) -> pd.DataFrame:
+    """Raw Alpaca crypto bars for one symbol, indexed by UTC timestamp."""
     request_params = CryptoBarsRequest(
         symbol_or_symbols=symbol,
-        timeframe=TimeFrame(15, TimeFrameUnit.Minute),
-        start=datetime.now(timezone.utc) - timedelta(days=4) 
+        timeframe=TimeFrame(timeframe_mins, TimeFrameUnit.Minute),
+        start=start,
+        end=end
     )
-    
+
     bars = data_client.get_crypto_bars(request_params)
     if not bars or bars.df.empty:
         return pd.DataFrame()
-    
+
     df = bars.df
+    # Alpaca returns a MultiIndex (symbol, timestamp). We drop the symbol to easily iterate by time.
     if isinstance(df.index, pd.MultiIndex):
         df = df.reset_index(level=0, drop=True)
-        
-    return calculate_heikin_ashi(df)
\ No newline at end of file
+    return df
+
+def load_cached_bars(symbol: str, timeframe_mins: int, start: datetime, end: datetime = None) -> pd.DataFrame:
+    """
+    Serves [start, end) from the local Arrow cache and only asks Alpaca for the parts the cache
+    does not cover yet (the head before the first cached bar and the tail from the last one).
+    Holes inside the cached range are not refetched: this cache only backs the bot's rolling
+    window and non-store backtest timeframes, whose holes are mostly quiet stretches Alpaca has
+    no bars for anyway.
+    """
+    timeframe = f"{timeframe_mins}m"
+    start = pd.Timestamp(start)
+    end = pd.Timestamp(end) if end is not None else None
+
+    cached = candle_cache.read(symbol, timeframe, start=start, end=end)
+
+    if cached.empty:
+        fetched = [fetch_crypto_bars(symbol, timeframe_mins, start, end)]
+    else:
+        fetched = []
+        # Head: requested range starts before the cache does
+        if cached.index[0] - start > timedelta(minutes=timeframe_mins):
+            fetched.append(fetch_crypto_bars(symbol, timeframe_mins, start, cached.index[0]))
+        # Tail: re-fetch from the last cached bar, which may have been captured while still forming
+        if end is None or end - cached.index[-1] > timedelta(minutes=timeframe_mins):
+            fetched.append(fetch_crypto_bars(symbol, timeframe_mins, cached.index[-1], end))
+
+    fetched = [df for df in fetched if not df.empty]
+    if not fetched:
+        return cached
+
+    new_bars = pd.concat(fetched)
+    candle_cache.append(symbol, timeframe, new_bars)
+
+    df = pd.concat([cached, new_bars])
+    return df[~df.index.duplicated(keep="last")].sort_index()
+
+def get_latest_data(symbol: str) -> pd.DataFrame:
+    """
+    Returns the last LOOKBACK of 15m bars with Heikin-Ashi columns.
+    After the first call per symbol only bars from the newest one on are requested,
+    and HA is extended from the last HA open/close instead of being recomputed.
+    """
+    window_start = datetime.now(timezone.utc) - LOOKBACK
+    window = _latest_windows.get(symbol)
+
+    if window is None or window.index[-1] < window_start:
+        # Cold start: local cache plus whatever it is missing
+        df = load_cached_bars(symbol, TIMEFRAME_MINS, window_start)
+        if df.empty:
+            return pd.DataFrame()
+        window = calculate_heikin_ashi(df)
+    else:
+        # Delta: re-request the newest bar too, it may have been captured while still forming
+        new_bars = fetch_crypto_bars(symbol, TIMEFRAME_MINS, window.index[-1])
+        if not new_bars.empty:
+            candle_cache.append(symbol, f"{TIMEFRAME_MINS}m", new_bars)
+            window = extend_heikin_ashi(window[window.index < new_bars.index[0]], new_bars)
+
+    window = window[window.index >= window_start]
+    _latest_windows[symbol] = window
+    return window
@@ -1,21 +1,15 @@
 # backend/app/services/bot/execution.py
-from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import MarketOrderRequest
 from alpaca.trading.enums import OrderSide, TimeInForce
-from app.core.config import settings
 from app.models.trade import Trade, TradeStatus
+from app.services.bot.broker import broker_snapshot, trading_client
+from app.services.bot.exit_monitor import exit_monitor
 from datetime import datetime, timezone
 
-trading_client = TradingClient(settings.ALPACA_API_KEY, settings.ALPACA_SECRET_KEY, paper=True)
-
 def has_open_positions(symbol: str) -> bool:
     try:
-        clean_symbol = symbol.replace("/", "")
-        positions = trading_client.get_all_positions()
-        for pos in positions:
-            if pos.symbol == clean_symbol:
-                return True
-        return False
+        # A submitted order that hasn't filled yet counts too, so a slow fill never gets a second entry
+        return broker_snapshot.position(symbol) is not None or bool(broker_snapshot.open_orders(symbol))
     except Exception as e:
         print(f"Error checking positions: {e}")
         return True 
@@ -52,8 +46,7 @@ def execute_trade(signal: str, current_real_price: float, state, db_settings, sy
 
     # --- DYNAMIC POSITION SIZING ---
     try:
-        account = trading_client.get_account()
-        buying_power = float(account.equity)
+        buying_power = broker_snapshot.equity()
         
         # Max Allocation % (e.g. 50% of account)
         alloc_pct = db_settings.max_trade_allocation_pct / 100.0
@@ -79,6 +72,7 @@ def execute_trade(signal: str, current_real_price: float, state, db_settings, sy
 
     try:
         trading_client.submit_order(req)
+        broker_snapshot.invalidate()
         print(f"✅ ORDER SUBMITTED: {side.name} {quantity} {symbol} @ ${current_real_price:.2f}")
         print(f"🎯 Target TP: ${tp_price:.2f} | 🛡️ Target SL: ${sl_price:.2f}")
         
@@ -100,6 +94,7 @@ def execute_trade(signal: str, current_real_price: float, state, db_settings, sy
 
         db_session.add(new_trade)
         db_session.commit()
+        exit_monitor.track(new_trade)
 
         # Reset Trap
         state.is_outside_down = False
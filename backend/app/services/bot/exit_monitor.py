@@ -0,0 +1,247 @@
+# backend/app/services/bot/exit_monitor.py
+import bisect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from alpaca.data.live import CryptoDataStream
+from alpaca.trading.requests import MarketOrderRequest
+from alpaca.trading.enums import OrderSide, TimeInForce
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.trade import Trade, TradeStatus
+from app.services.bot.broker import broker_snapshot, trading_client
+
+# Closes run off the price feed's thread so a slow order submission never delays the next tick
+CLOSE_WORKERS = 4
+
+
+def _symbol_key(symbol: str) -> str:
+    # "BTC/USD" (bot/data API) and "BTCUSD" (trading API) are the same market
+    return symbol.replace("/", "")
+
+
+def exit_hit(side: str, tp_target: float, sl_target: float, price: float) -> bool:
+    if side == "BUY":
+        return price >= tp_target or price <= sl_target
+    return price <= tp_target or price >= sl_target
+
+
+def close_trade(trade_id: int, current_price: float) -> bool:
+    """
+    Sends the closing market order for one OPEN trade and books its PNL.
+    The row is locked and re-checked first, so the stream and the bar-close check can't both close it.
+    """
+    exit_monitor.index.remove(trade_id)
+
+    db = SessionLocal()
+    try:
+        trade = db.query(Trade).filter(Trade.id == trade_id).with_for_update().first()
+        if trade is None or trade.status != TradeStatus.OPEN:
+            db.rollback()
+            return False
+
+        print(f"🚨 Closing Trade ID {trade.id}: Target Hit @ {current_price}")
+        exit_side = OrderSide.SELL if trade.side == "BUY" else OrderSide.BUY
+
+        # Send closing Market Order
+        req = MarketOrderRequest(
+            symbol=_symbol_key(trade.symbol),
+            qty=trade.quantity,
+            side=exit_side,
+            time_in_force=TimeInForce.GTC
+        )
+        trading_client.submit_order(req)
+        broker_snapshot.invalidate()
+
+        # Update DB record
+        trade.status = TradeStatus.CLOSED
+        trade.exit_price = current_price
+        trade.exit_time = datetime.now(timezone.utc)
+
+        # Calculate real PNL
+        if trade.side == "BUY":
+            trade.pnl = (current_price - trade.entry_price) * trade.quantity
+            trade.pnl_percent = ((current_price - trade.entry_price) / trade.entry_price) * 100
+        else:
+            trade.pnl = (trade.entry_price - current_price) * trade.quantity
+            trade.pnl_percent = ((trade.entry_price - current_price) / trade.entry_price) * 100
+
+        db.commit()
+        print(f"✅ Trade Closed. PNL: ${trade.pnl:.2f}")
+        return True
+
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error closing trade: {e}")
+        return False
+    finally:
+        db.close()
+
+
+class OpenTradeIndex:
+    """
+    Open trades per symbol in two lists sorted by exit level, so a price tick finds every
+    triggered trade with two bisects instead of scanning all of them:
+      rising:  exits when price >= level (long TP, short SL)
+      falling: exits when price <= level (long SL, short TP)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rising = {}
+        self._falling = {}
+        self._entries = {}  # trade_id -> (symbol_key, rising_entry, falling_entry)
+
+    def add(self, trade_id: int, symbol: str, side: str, tp_target: float, sl_target: float):
+        key = _symbol_key(symbol)
+        rising_level, falling_level = (tp_target, sl_target) if side == "BUY" else (sl_target, tp_target)
+        rising_entry, falling_entry = (rising_level, trade_id), (falling_level, trade_id)
+
+        with self._lock:
+            self._discard(trade_id)
+            bisect.insort(self._rising.setdefault(key, []), rising_entry)
+            bisect.insort(self._falling.setdefault(key, []), falling_entry)
+            self._entries[trade_id] = (key, rising_entry, falling_entry)
+
+    def remove(self, trade_id: int):
+        with self._lock:
+            self._discard(trade_id)
+
+    def clear(self):
+        with self._lock:
+            self._rising, self._falling, self._entries = {}, {}, {}
+
+    def pop_hits(self, symbol: str, price: float) -> list:
+        """Removes and returns the ids of every trade whose SL or TP is hit at this price."""
+        key = _symbol_key(symbol)
+        with self._lock:
+            rising = self._rising.get(key, [])
+            falling = self._falling.get(key, [])
+            hits = [trade_id for _, trade_id in rising[:bisect.bisect_right(rising, (price, float("inf")))]]
+            hits += [trade_id for _, trade_id in falling[bisect.bisect_left(falling, (price, float("-inf"))):]]
+
+            hits = list(dict.fromkeys(hits))
+            for trade_id in hits:
+                self._discard(trade_id)
+            return hits
+
+    def _discard(self, trade_id: int):
+        entry = self._entries.pop(trade_id, None)
+        if entry is None:
+            return
+        key, rising_entry, falling_entry = entry
+        for levels, level_entry in ((self._rising[key], rising_entry), (self._falling[key], falling_entry)):
+            levels.pop(bisect.bisect_left(levels, level_entry))
+
+
+class AlpacaPriceFeed:
+    """Live crypto trade prints from Alpaca's websocket, on its own thread."""
+
+    def __init__(self):
+        self._stream = None
+        self._thread = None
+        self._symbols = set()
+        self._on_price = None
+
+    def start(self, symbols, on_price):
+        self._on_price = on_price
+        self._stream = CryptoDataStream(settings.ALPACA_API_KEY, settings.ALPACA_SECRET_KEY)
+        self.subscribe(symbols)
+        self._thread = threading.Thread(target=self._stream.run, name="exit-price-feed", daemon=True)
+        self._thread.start()
+
+    def subscribe(self, symbols):
+        new_symbols = set(symbols) - self._symbols
+        if self._stream is None or not new_symbols:
+            return
+        self._stream.subscribe_trades(self._handle_trade, *new_symbols)
+        self._symbols |= new_symbols
+
+    async def _handle_trade(self, trade):
+        self._on_price(trade.symbol, trade.price)
+
+    def stop(self):
+        if self._stream is not None:
+            try:
+                self._stream.stop()
+            except Exception as e:
+                print(f"⚠️ Error stopping price feed: {e}")
+        self._stream, self._thread, self._symbols = None, None, set()
+
+
+class ReplayPriceFeed:
+    """Local stand-in for the live feed: plays back (symbol, price) ticks synchronously on start()."""
+
+    def __init__(self, ticks):
+        self.ticks = ticks
+
+    def start(self, symbols, on_price):
+        for symbol, price in self.ticks:
+            on_price(symbol, price)
+
+    def subscribe(self, symbols):
+        pass
+
+    def stop(self):
+        pass
+
+
+class ExitMonitor:
+    """
+    Watches open trades' SL/TP targets tick by tick on whichever process is scheduler leader.
+    The index is rebuilt from the DB on start and by a periodic sync job; new entries are tracked directly.
+    """
+
+    def __init__(self):
+        self.index = OpenTradeIndex()
+        self._feed = None
+        self._closer = ThreadPoolExecutor(max_workers=CLOSE_WORKERS, thread_name_prefix="exit-close")
+
+    def sync(self) -> set:
+        """Rebuilds the index from the DB's OPEN trades. Returns their symbols."""
+        db = SessionLocal()
+        try:
+            open_trades = db.query(Trade).filter(Trade.status == TradeStatus.OPEN).all()
+        finally:
+            db.close()
+
+        self.index.clear()
+        for trade in open_trades:
+            # We temporarily stored the TP in 'pnl' and SL in 'pnl_percent'
+            self.index.add(trade.id, trade.symbol, trade.side, trade.pnl, trade.pnl_percent)
+        symbols = {trade.symbol for trade in open_trades}
+        if self._feed is not None:
+            self._feed.subscribe(symbols)
+        return symbols
+
+    def track(self, trade: Trade):
+        self.index.add(trade.id, trade.symbol, trade.side, trade.pnl, trade.pnl_percent)
+        if self._feed is not None:
+            self._feed.subscribe({trade.symbol})
+
+    def on_price(self, symbol: str, price: float):
+        for trade_id in self.index.pop_hits(symbol, price):
+            self._closer.submit(close_trade, trade_id, price)
+
+    def start(self, feed):
+        symbols = self.sync()
+        self._feed = feed
+        print(f"📡 Exit monitor watching {len(symbols)} symbols.")
+        feed.start(symbols, self.on_price)
+
+    def stop(self):
+        if self._feed is not None:
+            self._feed.stop()
+            self._feed = None
+
+
+exit_monitor = ExitMonitor()
+
+
+def start_exit_monitor():
+    if settings.EXIT_MONITOR_FEED == "alpaca":
+        exit_monitor.start(AlpacaPriceFeed())
+
+
+def stop_exit_monitor():
+    exit_monitor.stop()
@@ -0,0 +1,61 @@
+# backend/app/services/bot/monte_carlo.py
+import numpy as np
+
+# --- MONTE CARLO PARAMETERS ---
+MC_PATHS = 10_000
+MC_METHOD = "bootstrap"   # "bootstrap" (resample with replacement) or "shuffle" (reorder the same trades)
+RUIN_LOSS_PCT = 50.0      # A path is "ruined" once equity falls this far below the starting capital
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def trade_returns(trade_history: list, initial_capital: float) -> np.ndarray:
+    """Each trade's profit as a fraction of the capital it was sized on (sizing is proportional to capital)."""
+    profits = np.array([trade['profit'] for trade in trade_history], dtype="float64")
+    capital_before = initial_capital + np.concatenate(([0.0], np.cumsum(profits)[:-1]))
+    return profits / capital_before
+
+
+def run_monte_carlo(trade_history: list, initial_capital: float, paths: int = MC_PATHS, method: str = MC_METHOD,
+                    ruin_loss_pct: float = RUIN_LOSS_PCT, seed: int = None) -> dict:
+    """
+    Resamples a backtest's trade returns into 'paths' alternative equity curves in one
+    (paths x trades) matrix and reports the return, max drawdown and risk-of-ruin distributions.
+    Shuffling keeps every path's final return equal to the backtest's, so only drawdowns vary.
+    Returns None when there are no trades.
+    """
+    if method not in ("bootstrap", "shuffle"):
+        raise ValueError(f"Unknown Monte Carlo method '{method}'")
+    if not trade_history:
+        return None
+
+    returns = trade_returns(trade_history, initial_capital)
+    growth = 1.0 + returns
+    rng = np.random.default_rng(seed)
+    if method == "bootstrap":
+        equity = growth[rng.integers(0, len(growth), size=(paths, len(growth)), dtype=np.int32)]
+    else:
+        equity = rng.permuted(np.broadcast_to(growth, (paths, len(growth))), axis=1)
+
+    # Equity relative to the starting capital (1.0), which also counts as the first peak
+    np.cumprod(equity, axis=1, out=equity)
+    peaks = np.maximum.accumulate(equity, axis=1)
+    np.maximum(peaks, 1.0, out=peaks)
+
+    total_return_pct = (equity[:, -1] - 1.0) * 100
+    max_drawdown_pct = ((peaks - equity) / peaks).max(axis=1) * 100
+    ruined = equity.min(axis=1) <= 1.0 - ruin_loss_pct / 100
+
+    return {
+        'method': method,
+        'paths': paths,
+        'trades': len(returns),
+        'total_return_pct': dict(zip(
+            (f"p{p}" for p in PERCENTILES), np.percentile(total_return_pct, PERCENTILES).tolist()
+        )),
+        'max_drawdown_pct': dict(zip(
+            (f"p{p}" for p in PERCENTILES), np.percentile(max_drawdown_pct, PERCENTILES).tolist()
+        )),
+        'probability_of_loss': float((total_return_pct < 0).mean()),
+        'ruin_loss_pct': ruin_loss_pct,
+        'risk_of_ruin': float(ruined.mean())
+    }
@@ -0,0 +1,193 @@
+# backend/app/services/bot/portfolio_backtest.py
+import os
+import time
+import heapq
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+
+# Project Imports
+from app.core.database import SessionLocal
+from app.models.settings import GlobalSettings, Watchlist
+from app.services.bot.backtest_data import load_backtest_bars
+from app.services.bot.backtest_engine import BarArrays, summarize_trades, trade_events
+from app.services.bot.backtester import DEFAULT_PARAMS, TIMEFRAME_MINS
+from app.services.bot.indicators import calculate_heikin_ashi
+from app.services.bot.process_pool import process_pool
+
+# A year of 15m bars per symbol by default
+PORTFOLIO_DAYS_BACK = 365
+
+# Used when global_settings has no row yet (same as the model default)
+DEFAULT_MAX_ALLOCATION_PCT = 2.0
+
+
+def _symbol_signals(job: tuple) -> tuple:
+    """
+    Pool worker: loads one symbol's bars and generates its trades at unit size.
+    Returns (symbol, arrays) with entry/exit times (ns), side, prices and per-unit risk, or an error string.
+    """
+    symbol, timeframe_mins, start, end, params = job
+    try:
+        raw_df = load_backtest_bars(symbol, timeframe_mins, start, end)
+        if raw_df.empty:
+            return symbol, f"no {timeframe_mins}m data"
+
+        bars = BarArrays(calculate_heikin_ashi(raw_df))
+        events = list(trade_events(bars, params))
+    except Exception as e:
+        return symbol, str(e)
+
+    j, k, side, entry, exit_price, risk = zip(*events) if events else ([],) * 6
+    return symbol, {
+        'entry_ns': bars.timestamp_ns[list(j)],
+        'exit_ns': bars.timestamp_ns[list(k)],
+        'is_long': np.array([s == 'LONG' for s in side], dtype=bool),
+        'entry_price': np.array(entry, dtype="float64"),
+        'exit_price': np.array(exit_price, dtype="float64"),
+        'risk_amount': np.array(risk, dtype="float64")
+    }
+
+
+def load_portfolio_settings() -> tuple:
+    """Active watchlist symbols (as stored, e.g. "BTC/USD") and max_trade_allocation_pct from GlobalSettings."""
+    db = SessionLocal()
+    try:
+        symbols = [row.ticker for row in db.query(Watchlist).filter(Watchlist.is_active == True).all()]
+        settings_row = db.query(GlobalSettings).first()
+    finally:
+        db.close()
+    max_allocation_pct = settings_row.max_trade_allocation_pct if settings_row else DEFAULT_MAX_ALLOCATION_PCT
+    return symbols, max_allocation_pct
+
+
+def simulate_portfolio(signals: dict, params: dict, max_allocation_pct: float) -> tuple:
+    """
+    Replays every symbol's trades in time order against one capital pot.
+    Size is the strategy's risk sizing on current capital, capped at max_allocation_pct of capital
+    per position and by the cash not already tied up in open positions. Entries that can't be
+    funded are skipped. Returns (trade_history, final_capital, skipped).
+    """
+    names = list(signals)
+    merged = {
+        field: np.concatenate([signals[name][field] for name in names])
+        for field in ('entry_ns', 'exit_ns', 'is_long', 'entry_price', 'exit_price', 'risk_amount')
+    }
+    owner = np.repeat(np.arange(len(names)), [len(signals[name]['entry_ns']) for name in names])
+    order = np.lexsort((merged['exit_ns'], merged['entry_ns']))
+    # Plain lists in entry order: the loop below touches single elements, which numpy makes slow
+    entry_ns, exit_ns, is_long, entry_price, exit_price, risk_amount = (
+        merged[field][order].tolist()
+        for field in ('entry_ns', 'exit_ns', 'is_long', 'entry_price', 'exit_price', 'risk_amount')
+    )
+
+    capital = params['initial_capital']
+    cash = capital
+    risk_pct = params['trade_risk_pct']
+    allocation = max_allocation_pct / 100.0
+    open_positions = []  # heap of (exit_ns, position in entry order, qty)
+    booked = []
+    skipped = 0
+
+    def close(_, t, qty):
+        nonlocal capital, cash
+        profit = (exit_price[t] - entry_price[t]) * qty if is_long[t] else (entry_price[t] - exit_price[t]) * qty
+        capital += profit
+        cash += qty * entry_price[t] + profit
+        booked.append((t, qty, profit))
+
+    for t in range(len(order)):
+        while open_positions and open_positions[0][0] <= entry_ns[t]:
+            close(*heapq.heappop(open_positions))
+
+        qty = min(
+            (capital * risk_pct) / risk_amount[t],
+            (capital * allocation) / entry_price[t],
+            cash / entry_price[t]
+        )
+        if qty <= 0:
+            skipped += 1
+            continue
+        cash -= qty * entry_price[t]
+        heapq.heappush(open_positions, (exit_ns[t], t, qty))
+
+    while open_positions:
+        close(*heapq.heappop(open_positions))
+
+    # Closing order is the order capital changed in; list trades by exit like the single-symbol engine
+    closed = [t for t, _, _ in booked]
+    entry_times = pd.to_datetime(np.array(entry_ns, dtype="int64")[closed], utc=True)
+    exit_times = pd.to_datetime(np.array(exit_ns, dtype="int64")[closed], utc=True)
+    trade_history = [
+        {
+            'symbol': names[owner[order[t]]],
+            'side': 'LONG' if is_long[t] else 'SHORT',
+            'entry_time': entry_time,
+            'exit_time': exit_time,
+            'entry_price': entry_price[t],
+            'exit_price': exit_price[t],
+            'quantity': qty,
+            'profit': profit,
+            'result': 'WIN' if profit > 0 else 'LOSS'
+        }
+        for (t, qty, profit), entry_time, exit_time in zip(booked, entry_times, exit_times)
+    ]
+    return trade_history, capital, skipped
+
+
+def run_portfolio_backtest(symbols: list = None, timeframe_mins: int = TIMEFRAME_MINS,
+                           days_back: int = PORTFOLIO_DAYS_BACK, params: dict = None,
+                           max_allocation_pct: float = None, workers: int = None) -> dict:
+    """
+    Backtests the whole active watchlist (or 'symbols') as one portfolio. Per-symbol data loading
+    and signal generation run in a process pool; the merged, time-ordered simulation with shared
+    capital runs here. Returns summary, per-symbol breakdown and trades.
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    if symbols is None or max_allocation_pct is None:
+        watchlist_symbols, settings_allocation = load_portfolio_settings()
+        symbols = symbols if symbols is not None else watchlist_symbols
+        max_allocation_pct = max_allocation_pct if max_allocation_pct is not None else settings_allocation
+    if not symbols:
+        raise ValueError("No symbols to backtest")
+
+    end = pd.Timestamp(datetime.now(timezone.utc)).floor(f"{timeframe_mins}min")
+    start = end - timedelta(days=days_back)
+    workers = workers or os.cpu_count() or 1
+
+    print(f"📥 Generating signals for {len(symbols)} symbols on {workers} workers...")
+    started = time.perf_counter()
+    with process_pool(workers) as pool:
+        jobs = [(symbol, timeframe_mins, start, end, params) for symbol in symbols]
+        results = list(pool.map(_symbol_signals, jobs))
+
+    signals = {}
+    for symbol, result in results:
+        if isinstance(result, str):
+            print(f"⚠️ Skipping {symbol}: {result}")
+        else:
+            signals[symbol] = result
+    if not signals:
+        raise ValueError("No symbol produced data")
+    print(f"⏱️ Signals ready in {time.perf_counter() - started:.1f}s")
+
+    trade_history, capital, skipped = simulate_portfolio(signals, params, max_allocation_pct)
+    summary = summarize_trades(trade_history, capital, params['initial_capital'])
+    summary['skipped_entries'] = skipped
+    summary['symbols'] = len(signals)
+
+    per_symbol = pd.DataFrame(trade_history, columns=['symbol', 'profit']).groupby('symbol')['profit'].agg(
+        trades='count', profit='sum'
+    ).reindex(list(signals), fill_value=0)
+    return {'summary': summary, 'per_symbol': per_symbol, 'trades': trade_history}
+
+
+if __name__ == "__main__":
+    report = run_portfolio_backtest()
+    print("\n" + "="*40)
+    print(f"📊 PORTFOLIO BACKTEST RESULTS ({report['summary']['symbols']} symbols)")
+    print("="*40)
+    for key, value in report['summary'].items():
+        print(f"{key}: {value}")
+    print("="*40)
+    print(report['per_symbol'].sort_values('profit', ascending=False).to_string())
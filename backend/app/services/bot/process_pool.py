@@ -0,0 +1,13 @@
+# backend/app/services/bot/process_pool.py
+import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def process_pool(workers: int, initializer=None, initargs: tuple = ()) -> ProcessPoolExecutor:
+    """
+    Process pool for backtest work. forkserver (spawn on Windows): workers start clean even when
+    the pool is created from a threaded process (API, scheduler), which must never be forked directly.
+    """
+    context = multiprocessing.get_context("forkserver" if sys.platform != "win32" else "spawn")
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=initializer, initargs=initargs)
@@ -1,66 +1,124 @@
 # backend/app/services/bot/runner.py
+import pandas as pd
 from datetime import datetime, timezone
+from functools import partial
 from app.core.database import SessionLocal
 from app.models.settings import GlobalSettings, Watchlist
+from app.models.strategy_state import StrategyCheckpoint
 from app.models.trade import Trade, TradeStatus
+from app.services.market_data import refresh_tickers_concurrently
 
-from .data_fetcher import get_latest_data
+from .data_fetcher import TIMEFRAME_MINS, get_latest_data
 from .state_manager import StrategyState
 from .strategy_logic import check_for_signals
-from .execution import has_open_positions, execute_trade, trading_client
-from alpaca.trading.requests import MarketOrderRequest
-from alpaca.trading.enums import OrderSide, TimeInForce
+from .execution import has_open_positions, execute_trade
+from .broker import broker_snapshot
+from .exit_monitor import close_trade, exit_hit
 
-def check_and_close_open_trades(db, current_price):
-    """Monitors open trades and closes them if SL/TP targets are hit."""
-    open_trades = db.query(Trade).filter(Trade.status == TradeStatus.OPEN).all()
+def check_and_close_open_trades(db, current_price, symbol: str):
+    """
+    Bar-close safety net for the symbol's open trades. The exit monitor normally closes
+    them tick by tick; this catches anything it missed (e.g. while the feed was down).
+    """
+    open_trades = db.query(Trade).filter(Trade.status == TradeStatus.OPEN, Trade.symbol == symbol).all()
     
     for trade in open_trades:
         # We temporarily stored the TP in 'pnl' and SL in 'pnl_percent'
-        tp_target = trade.pnl
-        sl_target = trade.pnl_percent
-        
-        close_trade = False
-        
-        if trade.side == "BUY":
-            if current_price >= tp_target or current_price <= sl_target:
-                close_trade = True
-                exit_side = OrderSide.SELL
-        elif trade.side == "SELL":
-            if current_price <= tp_target or current_price >= sl_target:
-                close_trade = True
-                exit_side = OrderSide.BUY
-
-        if close_trade:
-            print(f"🚨 Closing Trade ID {trade.id}: Target Hit @ {current_price}")
-            try:
-                # Send closing Market Order
-                req = MarketOrderRequest(
-                    symbol=trade.symbol.replace("/", ""),
-                    qty=trade.quantity,
-                    side=exit_side,
-                    time_in_force=TimeInForce.GTC
-                )
-                trading_client.submit_order(req)
-                
-                # Update DB record
-                trade.status = TradeStatus.CLOSED
-                trade.exit_price = current_price
-                trade.exit_time = datetime.now(timezone.utc)
-                
-                # Calculate real PNL
-                if trade.side == "BUY":
-                    trade.pnl = (current_price - trade.entry_price) * trade.quantity
-                    trade.pnl_percent = ((current_price - trade.entry_price) / trade.entry_price) * 100
-                else:
-                    trade.pnl = (trade.entry_price - current_price) * trade.quantity
-                    trade.pnl_percent = ((trade.entry_price - current_price) / trade.entry_price) * 100
-                
-                db.commit()
-                print(f"✅ Trade Closed. PNL: ${trade.pnl:.2f}")
-                
-            except Exception as e:
-                print(f"❌ Error closing trade: {e}")
+        if exit_hit(trade.side, trade.pnl, trade.pnl_percent, current_price):
+            close_trade(trade.id, current_price)
+    db.expire_all()
+
+def apply_bars(bot_state: StrategyState, bars: pd.DataFrame):
+    for timestamp, open_, high, low, close, ha_open, ha_close in zip(
+        bars.index, bars['open'], bars['high'], bars['low'],
+        bars['close'], bars['HA_Open'], bars['HA_Close']
+    ):
+        candle = {
+            'open': open_, 'high': high, 'low': low, 'close': close,
+            'HA_Open': ha_open, 'HA_Close': ha_close
+        }
+        bot_state.update_state(timestamp, candle)
+
+def restore_strategy_state(db, symbol: str, df: pd.DataFrame) -> StrategyState:
+    """
+    Loads the symbol's checkpointed StrategyState and applies only the bars newer than it.
+    Falls back to a full replay of 'df' if there is no checkpoint or it does not line up
+    with the fetched window (e.g. the bot was down longer than the lookback).
+    """
+    checkpoint = db.get(StrategyCheckpoint, symbol)
+    last_bar_time = pd.Timestamp(checkpoint.last_bar_time) if checkpoint else None
+
+    if last_bar_time is not None and not df.empty and df.index[0] <= last_bar_time <= df.index[-1]:
+        bot_state = StrategyState.from_dict(checkpoint.state)
+        new_bars = df[df.index > last_bar_time]
+    else:
+        print(f"♻️ No usable checkpoint for {symbol}. Rebuilding state from {len(df)} bars.")
+        bot_state = StrategyState()
+        new_bars = df
+
+    apply_bars(bot_state, new_bars)
+    return bot_state
+
+def save_strategy_state(db, symbol: str, bot_state: StrategyState, last_bar_time):
+    checkpoint = db.get(StrategyCheckpoint, symbol)
+    if checkpoint is None:
+        checkpoint = StrategyCheckpoint(symbol=symbol)
+        db.add(checkpoint)
+    checkpoint.state = bot_state.to_dict()
+    checkpoint.last_bar_time = last_bar_time.to_pydatetime()
+    db.commit()
+
+def evaluate_symbol(symbol: str, trading_settings, db) -> bool:
+    """One strategy tick for one symbol on its own session. Returns False if there was no data."""
+    df = get_latest_data(symbol)
+    if df.empty:
+        print(f"⚠️ No data returned for {symbol}.")
+        return False
+
+    latest_close_price = df.iloc[-1]['close']
+
+    # --- NEW: Check exits before looking for new entries ---
+    check_and_close_open_trades(db, latest_close_price, symbol)
+
+    # Only bars since the last checkpoint are applied, so this stays O(new bars).
+    # State keeps advancing while a position is open, exactly like the old full replay.
+    # Only closed bars are checkpointed: the newest bar may still be forming, and its final
+    # values have to be applied once it closes. The live state adds it on top for this tick.
+    closed_before = pd.Timestamp.now(tz="UTC").floor(f"{TIMEFRAME_MINS}min")
+    closed_bars = df[df.index < closed_before]
+    bot_state = restore_strategy_state(db, symbol, closed_bars)
+    live_state = StrategyState.from_dict(bot_state.to_dict())
+    apply_bars(live_state, df[df.index >= closed_before])
+
+    if has_open_positions(symbol):
+        if not closed_bars.empty:
+            save_strategy_state(db, symbol, bot_state, closed_bars.index[-1])
+        print(f"⏳ Open position exists for {symbol}. Monitoring targets.")
+        return True
+
+    latest_candle = {
+        'open': df.iloc[-1]['open'],
+        'high': df.iloc[-1]['high'],
+        'low': df.iloc[-1]['low'],
+        'close': df.iloc[-1]['close'],
+        'HA_Open': df.iloc[-1]['HA_Open'],
+        'HA_Close': df.iloc[-1]['HA_Close']
+    }
+
+    signal = check_for_signals(live_state, latest_candle)
+
+    if signal != "NONE":
+        # Pass db session to execute_trade so it can log the entry
+        execute_trade(signal, latest_candle['close'], live_state, trading_settings, symbol, db)
+        # A filled entry resets the trap; carry that into the checkpoint so it stays reset
+        if not (live_state.is_outside_up or live_state.is_outside_down):
+            bot_state.is_outside_up = bot_state.is_outside_down = False
+    else:
+        print(f"👀 Scanning {symbol}... Range: [${live_state.range_low} - ${live_state.range_high}]. No entry conditions met.")
+
+    if not closed_bars.empty:
+        save_strategy_state(db, symbol, bot_state, closed_bars.index[-1])
+    return True
 
 def run_bot_iteration():
     print(f"\n--- 🤖 Running 15m Strategy Check: {datetime.now(timezone.utc).strftime('%H:%M UTC')} ---")
@@ -72,58 +130,23 @@ def run_bot_iteration():
             print("💤 Trading is disabled in UI. Skipping.")
             return
             
-        active_ticker = db.query(Watchlist).filter(Watchlist.is_active == True).first()
-        if not active_ticker:
+        active_tickers = db.query(Watchlist).filter(Watchlist.is_active == True).all()
+        if not active_tickers:
             print("⚠️ No active tickers in watchlist.")
             return
-            
-        symbol = active_ticker.ticker
-
-        df = get_latest_data(symbol)
-        if df.empty:
-            print(f"⚠️ No data returned for {symbol}.")
-            return
-            
-        latest_close_price = df.iloc[-1]['close']
 
-        # --- NEW: Check exits before looking for new entries ---
-        check_and_close_open_trades(db, latest_close_price)
+        # Positions/equity are fetched once for the whole tick and shared by every symbol job
+        broker_snapshot.invalidate()
 
-        if has_open_positions(symbol):
-            print(f"⏳ Open position exists for {symbol}. Monitoring targets.")
-            return
-
-        bot_state = StrategyState()
-
-        for timestamp, row in df.iterrows():
-            candle = {
-                'open': row['open'],
-                'high': row['high'],
-                'low': row['low'],
-                'close': row['close'],
-                'HA_Open': row['HA_Open'],
-                'HA_Close': row['HA_Close']
-            }
-            bot_state.update_state(timestamp, candle)
-
-        latest_candle = {
-            'open': df.iloc[-1]['open'],
-            'high': df.iloc[-1]['high'],
-            'low': df.iloc[-1]['low'],
-            'close': df.iloc[-1]['close'],
-            'HA_Open': df.iloc[-1]['HA_Open'],
-            'HA_Close': df.iloc[-1]['HA_Close']
+        # Each symbol runs on its own session and thread (bounded pool), so one slow fetch
+        # or failing symbol doesn't hold up or break the rest of the tick.
+        jobs = {
+            ticker.ticker: partial(evaluate_symbol, ticker.ticker, settings)
+            for ticker in active_tickers
         }
-
-        signal = check_for_signals(bot_state, latest_candle)
-
-        if signal != "NONE":
-            # Pass db session to execute_trade so it can log the entry
-            execute_trade(signal, latest_candle['close'], bot_state, settings, symbol, db)
-        else:
-            print(f"👀 Scanning {symbol}... Range: [${bot_state.range_low} - ${bot_state.range_high}]. No entry conditions met.")
+        refresh_tickers_concurrently(jobs, label="Strategy check")
 
     except Exception as e:
         print(f"❌ Bot Iteration Error: {e}")
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
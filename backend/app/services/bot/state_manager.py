@@ -12,6 +12,21 @@ class StrategyState:
         self.ext_high = None
         self.ext_low = None
 
+    def to_dict(self) -> dict:
+        """JSON-safe snapshot used for the per-symbol checkpoint."""
+        return {
+            key: float(value) if isinstance(value, float) else value
+            for key, value in self.__dict__.items()
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StrategyState":
+        state = cls()
+        for key in state.__dict__:
+            if key in data:
+                setattr(state, key, data[key])
+        return state
+
     def update_state(self, current_time, latest_candle):
         real_high = latest_candle['high']
         real_low = latest_candle['low']
@@ -0,0 +1,153 @@
+# backend/app/services/bot/walk_forward.py
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Project Imports
+from app.services.bot.backtest_engine import BarArrays, simulate_vectorized, summarize_trades
+from app.services.bot.backtest_sweep import attach_shared_bars, expand_grid, load_sweep_bars, worker_bars
+from app.services.bot.backtester import DEFAULT_PARAMS, SYMBOL, TIMEFRAME_MINS
+from app.services.bot.process_pool import process_pool
+
+# --- WALK-FORWARD PARAMETERS ---
+HISTORY_DAYS = 730  # 2 years
+TRAIN_DAYS = 90
+TEST_DAYS = 30      # Also the step: test windows tile the out-of-sample period back to back
+MIN_TRAIN_TRADES = 10  # Parameter sets with fewer in-sample trades can't be selected
+
+# Searched on every train window (4 * 3 * 3 * 3 = 108 sets)
+WALK_FORWARD_GRID = {
+    'rr_ratio': [1.5, 2.0, 2.5, 3.0],
+    'max_risk_pct': [0.3, 0.5, 1.0],
+    'trail_start_r': [0.5, 1.0, 1.5],
+    'trail_offset_r': [0.25, 0.5, 1.0]
+}
+
+
+def _run_window(task: tuple) -> dict:
+    """Pool worker: one parameter set on one bar window of the shared series (trades only sent back if asked)."""
+    fold, combo_id, combo, start, stop, keep_trades = task
+    params = {**DEFAULT_PARAMS, **combo}
+    trade_history, capital = simulate_vectorized(worker_bars[TIMEFRAME_MINS], params, start=start, stop=stop)
+    return {
+        'fold': fold,
+        'combo_id': combo_id,
+        'trade_history': trade_history if keep_trades else None,
+        **summarize_trades(trade_history, capital, params['initial_capital'])
+    }
+
+
+def make_folds(bars: BarArrays, train_days: int = TRAIN_DAYS, test_days: int = TEST_DAYS) -> list:
+    """Rolling (train_start, train_stop, test_stop) bar indices; each test window follows its train window."""
+    day_ns = 24 * 3600 * 10**9
+    first = bars.timestamp_ns[0]
+    folds = []
+    test_start_ns = first + train_days * day_ns
+    while test_start_ns + test_days * day_ns <= bars.timestamp_ns[-1] + day_ns:
+        train_start, test_start, test_stop = np.searchsorted(
+            bars.timestamp_ns, [test_start_ns - train_days * day_ns, test_start_ns, test_start_ns + test_days * day_ns]
+        )
+        if test_stop > test_start:
+            folds.append((int(train_start), int(test_start), int(test_stop)))
+        test_start_ns += test_days * day_ns
+    return folds
+
+
+def stitch_out_of_sample(test_runs: list, initial_capital: float) -> tuple:
+    """
+    Chains the test windows into one compounding equity path. Every window ran from initial_capital
+    and sizing is proportional to capital, so scaling a window's profits by the capital it starts
+    with gives exactly the run it would have had. Returns (trade_history, final_capital).
+    """
+    capital = initial_capital
+    stitched = []
+    for run in test_runs:
+        scale = capital / initial_capital
+        for trade in run['trade_history']:
+            stitched.append({**trade, 'profit': trade['profit'] * scale})
+        capital += (run['final_balance'] - initial_capital) * scale
+    return stitched, capital
+
+
+def run_walk_forward(grid: dict = WALK_FORWARD_GRID, symbol: str = SYMBOL, history_days: int = HISTORY_DAYS,
+                     train_days: int = TRAIN_DAYS, test_days: int = TEST_DAYS, workers: int = None,
+                     rank_by: str = "total_return_pct") -> dict:
+    """
+    Walk-forward optimization: searches 'grid' on every rolling train window (all folds in parallel),
+    runs each fold's best set on the following test window and stitches the out-of-sample results.
+    HA and free-run arrays are built once for the whole history, shared with the workers, and every
+    window is simulated on a slice of them. Returns the fold table, out-of-sample summary and trades.
+    """
+    combos = expand_grid(grid)
+    workers = workers or os.cpu_count() or 1
+
+    print(f"📥 Preparing {history_days} days of {TIMEFRAME_MINS}m bars for {symbol}...")
+    bars = load_sweep_bars(symbol, TIMEFRAME_MINS, history_days)
+    folds = make_folds(bars, train_days, test_days)
+    if not folds:
+        raise ValueError(f"{history_days} days of history is too short for {train_days}/{test_days} day folds")
+
+    shm, layout = bars.to_shared_memory()
+    try:
+        started = time.perf_counter()
+        with process_pool(workers, initializer=attach_shared_bars,
+                          initargs=({TIMEFRAME_MINS: (shm.name, layout)},)) as pool:
+            print(f"🧪 Optimizing {len(folds)} folds x {len(combos)} sets on {workers} workers...")
+            train_tasks = [
+                (fold, combo_id, combo, train_start, test_start, False)
+                for fold, (train_start, test_start, _) in enumerate(folds)
+                for combo_id, combo in enumerate(combos)
+            ]
+            chunksize = max(1, len(train_tasks) // (workers * 4))
+            train = pd.DataFrame(pool.map(_run_window, train_tasks, chunksize=chunksize)).drop(columns='trade_history')
+
+            # Best set per fold among sets that traded enough to mean anything; a fold where none
+            # did falls back to its best set overall
+            train['eligible'] = train['total_trades'] >= MIN_TRAIN_TRADES
+            best = train.sort_values(['eligible', rank_by], ascending=False, na_position="last")
+            best = best.groupby('fold').head(1).set_index('fold')
+
+            test_tasks = [
+                (fold, int(best.at[fold, 'combo_id']), combos[int(best.at[fold, 'combo_id'])], test_start, test_stop, True)
+                for fold, (_, test_start, test_stop) in enumerate(folds)
+            ]
+            test_runs = list(pool.map(_run_window, test_tasks))
+        print(f"⏱️ Walk-forward finished in {time.perf_counter() - started:.1f}s")
+    finally:
+        shm.close()
+        shm.unlink()
+
+    trade_history, capital = stitch_out_of_sample(test_runs, DEFAULT_PARAMS['initial_capital'])
+
+    fold_rows = []
+    for fold, (train_start, test_start, test_stop) in enumerate(folds):
+        run = test_runs[fold]
+        fold_rows.append({
+            'fold': fold,
+            'train_start': bars.timestamp(train_start),
+            'test_start': bars.timestamp(test_start),
+            'test_end': bars.timestamp(test_stop - 1),
+            **combos[run['combo_id']],
+            f'train_{rank_by}': best.at[fold, rank_by],
+            'test_trades': run['total_trades'],
+            'test_return_pct': run['total_return_pct']
+        })
+
+    return {
+        'folds': pd.DataFrame(fold_rows),
+        'summary': summarize_trades(trade_history, capital, DEFAULT_PARAMS['initial_capital']),
+        'trades': trade_history
+    }
+
+
+if __name__ == "__main__":
+    report = run_walk_forward()
+    with pd.option_context("display.max_columns", None, "display.width", 200):
+        print(report['folds'].to_string(index=False))
+    print("\n" + "="*40)
+    print("📊 OUT-OF-SAMPLE RESULTS")
+    print("="*40)
+    for key, value in report['summary'].items():
+        print(f"{key}: {value}")
+    print("="*40)
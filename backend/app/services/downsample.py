@@ -0,0 +1,71 @@
+# backend/app/services/downsample.py
+import numpy as np
+
+# Points per chart series when the caller doesn't ask for a specific count
+DEFAULT_CHART_POINTS = 1000
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, target: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: keeps the first and last point and, from each of target-2
+    equal buckets in between, the point forming the largest triangle with the previously kept
+    point and the next bucket's average. Preserves the visual shape of a line chart.
+    """
+    n = len(y)
+    if target >= n or target < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, target - 1).astype(np.int64)
+    selected = np.empty(target, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for bucket in range(target - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean()
+        avg_y = y[stop:next_stop].mean()
+
+        areas = np.abs((x[a] - avg_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        a = start + int(areas.argmax())
+        selected[bucket + 1] = a
+    return selected
+
+
+def minmax_indices(y: np.ndarray, target: int) -> np.ndarray:
+    """Min and max of each of target/2 equal buckets (plus the endpoints), fully vectorized."""
+    n = len(y)
+    buckets = target // 2
+    if target >= n or buckets < 1:
+        return np.arange(n)
+
+    bucket_ids = np.arange(n) * buckets // n
+    # Sorted by (bucket, value): each bucket's first entry is its min, its last its max
+    order = np.lexsort((y, bucket_ids))
+    firsts = np.flatnonzero(np.r_[True, bucket_ids[order][1:] != bucket_ids[order][:-1]])
+    lasts = np.r_[firsts[1:] - 1, n - 1]
+    return np.unique(np.concatenate(([0, n - 1], order[firsts], order[lasts])))
+
+
+def downsample_indices(x: np.ndarray, y: np.ndarray, target: int = DEFAULT_CHART_POINTS,
+                       keep: np.ndarray = None, method: str = "lttb") -> np.ndarray:
+    """
+    Sorted indices of the points to plot for a series of length len(y), about 'target' of them.
+    Indices in 'keep' (e.g. the bars trades entered/exited on) are always included exactly.
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown downsample method '{method}'")
+
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    if method == "lttb":
+        selected = lttb_indices(x, y, target)
+    else:
+        selected = minmax_indices(y, target)
+
+    if keep is not None and len(keep):
+        keep = np.asarray(keep, dtype=np.int64)
+        selected = np.concatenate((selected, keep[(keep >= 0) & (keep < len(y))]))
+    return np.unique(selected)
@@ -1,11 +1,17 @@
 # backend/app/services/market_data.py
+import csv
+import io
+import time
 import pandas as pd
 import yfinance as yf
-from datetime import datetime, timedelta
-from sqlalchemy import func
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from sqlalchemy import func, text
 from sqlalchemy.orm import Session
-from sqlalchemy.dialects.postgresql import insert
-from app.models.market_data import MarketCandle
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.market_data import MarketCandle, MarketSymbol, TIMEFRAME_IDS
 from app.models.settings import Watchlist
 
 # Map our internal string representation to Pandas resample rules
@@ -30,58 +36,186 @@ YF_MAX_PERIODS = {
     "1d": "max"
 }
 
-def _upsert_candles(db: Session, candles_data: list, ticker: str, timeframe: str):
-    """Helper method to handle the database upsert logic."""
-    if not candles_data:
+# In "timescale" storage only 1m rows are written; higher timeframes come from these
+# continuous aggregates (see the market_candles hypertable migration)
+USE_CONTINUOUS_AGGREGATES = settings.CANDLE_STORAGE == "timescale"
+CONTINUOUS_AGGREGATES = {
+    "5m": "market_candles_5m",
+    "15m": "market_candles_15m",
+    "30m": "market_candles_30m",
+    "1h": "market_candles_1h",
+    "4h": "market_candles_4h",
+    "1d": "market_candles_1d"
+}
+
+# Tickers refreshed in parallel. Each worker holds its own DB session, so keep this
+# below the SQLAlchemy pool size + overflow (5 + 10 by default).
+MAX_REFRESH_WORKERS = 8
+
+# --- GAP PLANNER ---
+# yfinance only serves 1m bars for the last 7 days
+YF_1M_LOOKBACK = timedelta(days=7)
+# Holes between stored 1m bars shorter than this are just quiet minutes
+GAP_TOLERANCE = timedelta(minutes=5)
+# Holes longer than this are market closures (nights, weekends), not missing data (non-crypto only)
+MAX_INTERNAL_GAP = timedelta(hours=12)
+# Fetch windows closer together than this are merged into a single request
+WINDOW_MERGE_TOLERANCE = timedelta(minutes=30)
+
+# Rows streamed per COPY + merge round trip. Keeps the staging table and the
+# merge's sort small even for 'max' 1d or 60d 5m seeds.
+COPY_CHUNK_ROWS = 50_000
+
+# Rows fetched per server-side cursor round trip when reading candles back
+LOAD_CHUNK_ROWS = 50_000
+
+_STAGING_DDL = """
+    CREATE TEMP TABLE IF NOT EXISTS market_candles_staging (
+        symbol VARCHAR NOT NULL,
+        timestamp TIMESTAMP NOT NULL,
+        open DOUBLE PRECISION NOT NULL,
+        high DOUBLE PRECISION NOT NULL,
+        low DOUBLE PRECISION NOT NULL,
+        close DOUBLE PRECISION NOT NULL,
+        volume BIGINT NOT NULL,
+        timeframe VARCHAR NOT NULL
+    ) ON COMMIT DELETE ROWS
+"""
+
+# Symbols are interned to small integer keys before the merge
+_INTERN_SYMBOLS_SQL = """
+    INSERT INTO market_symbols (symbol)
+    SELECT DISTINCT symbol FROM market_candles_staging
+    ON CONFLICT (symbol) DO NOTHING
+"""
+
+# DISTINCT ON guards against duplicate keys inside one batch, which
+# ON CONFLICT DO UPDATE refuses to touch twice in a single statement.
+_MERGE_SQL = """
+    INSERT INTO market_candles (symbol_id, timeframe_id, timestamp, open, high, low, close, volume)
+    SELECT DISTINCT ON (s.id, t.id, st.timestamp)
+        s.id, t.id, st.timestamp, st.open, st.high, st.low, st.close, st.volume
+    FROM market_candles_staging st
+    JOIN market_symbols s ON s.symbol = st.symbol
+    JOIN market_timeframes t ON t.label = st.timeframe
+    ORDER BY s.id, t.id, st.timestamp
+    ON CONFLICT ON CONSTRAINT market_candles_pkey DO UPDATE SET
+        open = EXCLUDED.open,
+        high = EXCLUDED.high,
+        low = EXCLUDED.low,
+        close = EXCLUDED.close,
+        volume = EXCLUDED.volume
+"""
+
+
+def is_crypto(ticker: str) -> bool:
+    # Watchlist crypto uses Alpaca's pair form ("BTC/USD") and trades 24/7
+    return "/" in ticker
+
+
+def _upsert_candles(db: Session, candle_rows: list, ticker: str, timeframe: str):
+    """
+    Bulk upsert: streams rows into a temp staging table with COPY, then merges them
+    into market_candles with one set-based INSERT ... ON CONFLICT per chunk.
+    Does NOT commit - callers commit once per ticker.
+    """
+    if not candle_rows:
         return
 
-    stmt = insert(MarketCandle).values(candles_data)
-    stmt = stmt.on_conflict_do_update(
-        constraint="uq_candle",
-        set_={
-            "open": stmt.excluded.open,
-            "high": stmt.excluded.high,
-            "low": stmt.excluded.low,
-            "close": stmt.excluded.close,
-            "volume": stmt.excluded.volume,
-        }
-    )
-    db.execute(stmt)
-    db.commit()
-    print(f"✅ Upserted {len(candles_data)} {timeframe} bars for {ticker}.")
+    # Raw psycopg2 connection bound to the session's current transaction
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(_STAGING_DDL)
+        for start in range(0, len(candle_rows), COPY_CHUNK_ROWS):
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(candle_rows[start:start + COPY_CHUNK_ROWS])
+            buffer.seek(0)
 
+            cursor.execute("TRUNCATE market_candles_staging")
+            cursor.copy_expert(
+                f"COPY market_candles_staging ({', '.join(CANDLE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+            cursor.execute(_INTERN_SYMBOLS_SQL)
+            cursor.execute(_MERGE_SQL)
+    finally:
+        cursor.close()
 
-def df_to_dict_list(df: pd.DataFrame, ticker: str, timeframe_str: str) -> list:
-    """Converts a Pandas DataFrame to a list of dicts safely handling Timezones."""
-    candles = []
-    for timestamp, row in df.iterrows():
-        # Drop rows with NaN values (after-hours gaps in higher timeframes)
-        if pd.isna(row["Open"]):
-            continue
-            
-        # CRITICAL FIX: Convert yfinance's local NY timezone to UTC before saving to DB
-        if timestamp.tzinfo is not None:
-            utc_timestamp = timestamp.tz_convert('UTC').tz_localize(None)
-        else:
-            utc_timestamp = timestamp
-            
-        candles.append({
-            "symbol": ticker,
-            "timestamp": utc_timestamp,
-            "open": float(row["Open"]),
-            "high": float(row["High"]),
-            "low": float(row["Low"]),
-            "close": float(row["Close"]),
-            "volume": int(row["Volume"]),
-            "timeframe": timeframe_str
-        })
-    return candles
-
-
-def resample_and_store(df_1m: pd.DataFrame, ticker: str, db: Session):
-    """Takes 1m DataFrame, resamples to higher timeframes, and stores them."""
+    print(f"✅ Upserted {len(candle_rows)} {timeframe} bars for {ticker}.")
+
+
+# Column order of the rows produced by df_to_rows (and of the COPY staging table)
+CANDLE_COLUMNS = ("symbol", "timestamp", "open", "high", "low", "close", "volume", "timeframe")
+
+
+def df_to_rows(df: pd.DataFrame, ticker: str, timeframe_str: str) -> list:
+    """Columnar conversion of an OHLCV DataFrame into row tuples ordered like CANDLE_COLUMNS."""
+    # Drop rows with NaN values (after-hours gaps in higher timeframes)
+    df = df[df["Open"].notna()]
+    if df.empty:
+        return []
+
+    # CRITICAL FIX: Convert yfinance's local NY timezone to UTC before saving to DB.
+    # Done once for the whole index instead of per timestamp.
+    index = df.index
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+
+    # .tolist() hands back native Python floats/ints so the DB driver never sees numpy scalars
+    count = len(df)
+    return list(zip(
+        [ticker] * count,
+        index.to_pydatetime().tolist(),
+        df["Open"].to_numpy(dtype="float64").tolist(),
+        df["High"].to_numpy(dtype="float64").tolist(),
+        df["Low"].to_numpy(dtype="float64").tolist(),
+        df["Close"].to_numpy(dtype="float64").tolist(),
+        df["Volume"].fillna(0).to_numpy(dtype="int64").tolist(),
+        [timeframe_str] * count,
+    ))
+
+
+# Start of the newest (possibly still-forming) bucket written per (symbol, timeframe).
+# Every bucket before it is finalized, so maintenance only recomputes from here on.
+# Process-local: after a restart the first run simply resamples the full window again.
+_last_bucket_starts = {}
+
+
+def _tail_since_last_bucket(df: pd.DataFrame, ticker: str, tf_label: str) -> pd.DataFrame:
+    """Slices off bars that belong to already finalized buckets of this timeframe."""
+    last_start = _last_bucket_starts.get((ticker, tf_label))
+    if last_start is None:
+        return df
+    return df[df.index >= last_start]
+
+
+def _mark_buckets(ticker: str, bucket_starts: dict):
+    """Advances the finalized-bucket watermarks once the writes have been committed."""
+    for tf_label, start in bucket_starts.items():
+        current = _last_bucket_starts.get((ticker, tf_label))
+        if current is None or start > current:
+            _last_bucket_starts[(ticker, tf_label)] = start
+
+
+def _resample_intraday(df: pd.DataFrame, pandas_rule: str, agg_dict: dict) -> pd.DataFrame:
+    """
+    Bins counted from each day's local midnight (4h bins start at 00:00, 04:00, ... exchange time),
+    so a slice starting at any bucket bins exactly like the full history, across DST changes too.
+    """
+    day_start = df.index.normalize()
+    width = pd.Timedelta(pandas_rule)
+    buckets = day_start + ((df.index - day_start) // width) * width
+    return df.groupby(buckets).agg(agg_dict)
+
+
+def resample_and_store(df_1m: pd.DataFrame, ticker: str, db: Session, incremental: bool = True) -> dict:
+    """
+    Takes 1m DataFrame, resamples to higher timeframes, and stores them.
+    In incremental mode only buckets at or after the last written bucket are
+    recomputed. Returns the newest bucket start per timeframe for _mark_buckets.
+    """
     if df_1m.empty:
-        return
+        return {}
 
     # Pandas aggregation dictionary for OHLCV data
     agg_dict = {
@@ -92,21 +226,37 @@ def resample_and_store(df_1m: pd.DataFrame, ticker: str, db: Session):
         "Volume": "sum"
     }
 
+    bucket_starts = {}
+
     # Iterate through all higher timeframes and resample
     for tf_label, pandas_rule in TIMEFRAMES.items():
         if tf_label == "1m":
             continue # Already handled
-            
+
+        source_df = _tail_since_last_bucket(df_1m, ticker, tf_label) if incremental else df_1m
+        if source_df.empty:
+            continue
+
         print(f"🔄 Resampling {ticker} 1m data into {tf_label}...")
         
-        # We resample BEFORE converting to UTC. This ensures '1D' and '1h' 
+        # We resample BEFORE converting to UTC. This ensures '1D', '4h' and '1h'
         # boundaries align with NY Market Open/Close, not Midnight UTC.
-        resampled_df = df_1m.resample(pandas_rule).agg(agg_dict)
+        # pandas' own intraday grid starts at the slice's first midnight and would shift the
+        # 4h bins after a DST change, so intraday bins restart at every local midnight instead.
+        if pandas_rule == "1D":
+            resampled_df = source_df.resample(pandas_rule).agg(agg_dict)
+        else:
+            resampled_df = _resample_intraday(source_df, pandas_rule, agg_dict)
         resampled_df.dropna(inplace=True) 
+        if resampled_df.empty:
+            continue
         
-        # Convert to dictionary (which safely converts to UTC) and store
-        candles_data = df_to_dict_list(resampled_df, ticker, tf_label)
-        _upsert_candles(db, candles_data, ticker, tf_label)
+        # Convert to rows (which safely converts to UTC) and store
+        candle_rows = df_to_rows(resampled_df, ticker, tf_label)
+        _upsert_candles(db, candle_rows, ticker, tf_label)
+        bucket_starts[tf_label] = resampled_df.index[-1]
+
+    return bucket_starts
 
 
 def initial_seed_history(ticker: str, db: Session):
@@ -122,15 +272,18 @@ def initial_seed_history(ticker: str, db: Session):
         try:
             df = yf_ticker.history(period=period, interval=tf_label)
             if not df.empty:
-                candles = df_to_dict_list(df, ticker, tf_label)
-                _upsert_candles(db, candles, ticker, tf_label)
+                # Savepoint per timeframe: a failed interval must not discard the others
+                with db.begin_nested():
+                    _upsert_candles(db, df_to_rows(df, ticker, tf_label), ticker, tf_label)
         except Exception as e:
             print(f"❌ Error seeding {tf_label} for {ticker}: {e}")
-            db.rollback()
+
+    # One commit for the whole ticker
+    db.commit()
 
 
-def maintain_market_data(ticker: str, db: Session, period: str = "1d"):
-    """Regular maintenance: Fetches 1m data and propagates it upwards."""
+def maintain_market_data(ticker: str, db: Session, period: str = "1d") -> bool:
+    """Regular maintenance: Fetches 1m data and propagates it upwards. Returns False on failure."""
     print(f"📥 Fetching latest 1m data for {ticker} (Period: {period})...")
     try:
         yf_symbol = ticker.replace("/", "-")
@@ -140,57 +293,301 @@ def maintain_market_data(ticker: str, db: Session, period: str = "1d"):
         
         if df_1m.empty:
             print(f"⚠️ No new 1m data found for {ticker}.")
-            return
+            return True
 
-        # 1. Store the 1m base data
-        candles_1m = df_to_dict_list(df_1m, ticker, "1m")
+        # 1. Store the 1m base data (only bars from the last stored, possibly partial, minute on)
+        new_1m = _tail_since_last_bucket(df_1m, ticker, "1m")
+        candles_1m = df_to_rows(new_1m, ticker, "1m")
         _upsert_candles(db, candles_1m, ticker, "1m")
 
         # 2. Resample and store all higher timeframes using the 1m data
-        resample_and_store(df_1m, ticker, db)
+        #    (continuous aggregates derive them in-database in timescale mode)
+        bucket_starts = {} if USE_CONTINUOUS_AGGREGATES else resample_and_store(df_1m, ticker, db)
+        if not new_1m.empty:
+            bucket_starts["1m"] = new_1m.index[-1]
+
+        # 3. One commit for every timeframe of this ticker
+        db.commit()
+        _mark_buckets(ticker, bucket_starts)
+        return True
 
     except Exception as e:
         print(f"❌ Maintenance error for {ticker}: {e}")
         db.rollback()
+        return False
+
+
+def _run_ticker_job(job) -> tuple:
+    """Runs job(db) for one ticker on its own session. Returns (seconds, error or None)."""
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        ok = job(db)
+        error = "failed, see log above" if ok is False else None
+    except Exception as e:
+        db.rollback()
+        error = str(e)
+    finally:
+        db.close()
+    return time.perf_counter() - started, error
+
+
+def refresh_tickers_concurrently(jobs: dict, label: str = "Refresh") -> dict:
+    """
+    Runs {ticker: job(db)} on a bounded thread pool so a refresh cycle takes as long as
+    its slowest ticker rather than the sum of all of them.
+    Returns {ticker: (seconds, error or None)} and prints a timing/failure report.
+    """
+    if not jobs:
+        return {}
+
+    started = time.perf_counter()
+    results = {}
+    with ThreadPoolExecutor(max_workers=min(MAX_REFRESH_WORKERS, len(jobs))) as pool:
+        futures = {pool.submit(_run_ticker_job, job): ticker for ticker, job in jobs.items()}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    wall = time.perf_counter() - started
+
+    failed = {t: r for t, r in results.items() if r[1] is not None}
+    slowest = max(results, key=lambda t: results[t][0])
+    print(f"⏱️ {label}: {len(results) - len(failed)}/{len(results)} tickers OK in {wall:.1f}s "
+          f"(slowest: {slowest} {results[slowest][0]:.1f}s)")
+    for ticker, (seconds, _) in sorted(results.items(), key=lambda item: -item[1][0]):
+        print(f"   {ticker}: {seconds:.2f}s")
+    for ticker, (seconds, error) in failed.items():
+        print(f"❌ {label} failed for {ticker} after {seconds:.1f}s: {error}")
+
+    return results
 
 
 def update_all_watchlists(db: Session):
     """Regular update loop used by the scheduler (runs every minute)."""
     active_companies = db.query(Watchlist).filter(Watchlist.is_active == True).all()
-    for company in active_companies:
-        # Fetch the last 1 day of 1m data to ensure no overlapping gaps
-        maintain_market_data(company.ticker, db, period="1d")
+
+    # Fetch the last 1 day of 1m data to ensure no overlapping gaps
+    jobs = {
+        company.ticker: partial(maintain_market_data, company.ticker, period="1d")
+        for company in active_companies
+    }
+    return refresh_tickers_concurrently(jobs, label="Watchlist refresh")
+
+
+def iter_candle_chunks(db: Session, ticker: str, timeframe: str, start: datetime = None, end: datetime = None,
+                       chunk_rows: int = LOAD_CHUNK_ROWS):
+    """
+    Streams stored OHLCV bars for one symbol/timeframe in [start, end) (naive UTC) as DataFrames of
+    up to chunk_rows rows, from a single ordered range scan on a server-side cursor.
+    In timescale mode higher timeframes come from the continuous aggregate, topped up with
+    natively stored rows (seeded or backtest-fetched) for buckets the aggregate doesn't have.
+    """
+    symbol_id = db.query(MarketSymbol.id).filter(MarketSymbol.symbol == ticker).scalar()
+    if symbol_id is None:
+        return
+
+    if USE_CONTINUOUS_AGGREGATES and timeframe in CONTINUOUS_AGGREGATES:
+        source = f"""
+            SELECT timestamp, open, high, low, close, volume FROM {CONTINUOUS_AGGREGATES[timeframe]}
+            WHERE symbol_id = :symbol_id
+            UNION ALL
+            SELECT m.timestamp, m.open, m.high, m.low, m.close, m.volume FROM market_candles m
+            WHERE m.symbol_id = :symbol_id AND m.timeframe_id = :timeframe_id AND NOT EXISTS (
+                SELECT 1 FROM {CONTINUOUS_AGGREGATES[timeframe]} a
+                WHERE a.symbol_id = :symbol_id AND a.timestamp = m.timestamp
+            )
+        """
+    else:
+        source = """
+            SELECT timestamp, open, high, low, close, volume FROM market_candles
+            WHERE symbol_id = :symbol_id AND timeframe_id = :timeframe_id
+        """
+
+    # Literal bounds (not COALESCE'd parameters) let the planner prune chunks up front
+    bounds = []
+    if start is not None:
+        bounds.append("timestamp >= :start")
+    if end is not None:
+        bounds.append("timestamp < :end")
+    where = f"WHERE {' AND '.join(bounds)}" if bounds else ""
+
+    result = db.execute(text(f"""
+        SELECT timestamp, open, high, low, close, volume FROM ({source}) candles
+        {where}
+        ORDER BY timestamp
+    """), {"symbol_id": symbol_id, "timeframe_id": TIMEFRAME_IDS[timeframe], "start": start, "end": end},
+        execution_options={"yield_per": chunk_rows})
+
+    for rows in result.partitions(chunk_rows):
+        df = pd.DataFrame.from_records(rows, columns=["Timestamp", "Open", "High", "Low", "Close", "Volume"])
+        df.index = pd.DatetimeIndex(df.pop("Timestamp"))
+        yield df
+
+
+def load_candles(db: Session, ticker: str, timeframe: str, start: datetime = None, end: datetime = None) -> pd.DataFrame:
+    """Reads stored OHLCV bars for one symbol/timeframe in [start, end) (naive UTC). See iter_candle_chunks."""
+    chunks = list(iter_candle_chunks(db, ticker, timeframe, start, end))
+    if not chunks:
+        return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"], index=pd.DatetimeIndex([]))
+    return pd.concat(chunks) if len(chunks) > 1 else chunks[0]
+
+
+def _to_naive_utc(ts: pd.Timestamp) -> datetime:
+    return ts.tz_convert("UTC").tz_localize(None).to_pydatetime()
+
+
+def _load_1m_frame(db: Session, ticker: str, start: pd.Timestamp, end: pd.Timestamp, tz) -> pd.DataFrame:
+    """Reads stored 1m bars in [start, end) back into a yfinance-shaped frame in the exchange timezone."""
+    rows = db.query(
+        MarketCandle.timestamp, MarketCandle.open, MarketCandle.high,
+        MarketCandle.low, MarketCandle.close, MarketCandle.volume
+    ).join(
+        MarketSymbol, MarketSymbol.id == MarketCandle.symbol_id
+    ).filter(
+        MarketSymbol.symbol == ticker,
+        MarketCandle.timeframe_id == TIMEFRAME_IDS["1m"],
+        MarketCandle.timestamp >= _to_naive_utc(start),
+        MarketCandle.timestamp < _to_naive_utc(end)
+    ).order_by(MarketCandle.timestamp).all()
+
+    df = pd.DataFrame.from_records(rows, columns=["Timestamp", "Open", "High", "Low", "Close", "Volume"])
+    df.index = pd.DatetimeIndex(df.pop("Timestamp")).tz_localize("UTC").tz_convert(tz)
+    return df
+
+
+def backfill_windows(ticker: str, db: Session, windows: list) -> bool:
+    """
+    Fetches only the given (start, end) UTC windows of 1m data, stores them and rebuilds
+    the higher-timeframe buckets they touch. Returns False on failure.
+    """
+    try:
+        yf_ticker = yf.Ticker(ticker.replace("/", "-"))
+        bucket_starts = {}
+
+        for start, end in windows:
+            print(f"⏳ Backfilling {ticker} 1m {start:%Y-%m-%d %H:%M} → {end:%Y-%m-%d %H:%M} UTC...")
+            df_1m = yf_ticker.history(
+                start=start.replace(tzinfo=timezone.utc),
+                end=end.replace(tzinfo=timezone.utc),
+                interval="1m"
+            )
+            if df_1m.empty:
+                continue
+
+            _upsert_candles(db, df_to_rows(df_1m, ticker, "1m"), ticker, "1m")
+            bucket_starts["1m"] = max(df_1m.index[-1], bucket_starts.get("1m", df_1m.index[-1]))
+            if USE_CONTINUOUS_AGGREGATES:
+                continue
+
+            # A window usually covers only part of a higher bucket, so rebuild every bucket it
+            # touches from the stored 1m bars (whole exchange days) instead of the fetched slice.
+            tz = df_1m.index.tz or "UTC"
+            day_start = df_1m.index[0].normalize()
+            day_end = df_1m.index[-1].normalize() + pd.Timedelta(days=1)
+            stored_1m = _load_1m_frame(db, ticker, day_start, day_end, tz)
+
+            for tf_label, bucket_start in resample_and_store(stored_1m, ticker, db, incremental=False).items():
+                bucket_starts[tf_label] = max(bucket_start, bucket_starts.get(tf_label, bucket_start))
+
+        # One commit for every window of this ticker
+        db.commit()
+        _mark_buckets(ticker, bucket_starts)
+        return True
+
+    except Exception as e:
+        print(f"❌ Backfill error for {ticker}: {e}")
+        db.rollback()
+        return False
+
+
+def _merge_windows(windows: list) -> list:
+    """Sorts (start, end) windows and merges overlapping or nearly adjacent ones."""
+    merged = []
+    for start, end in sorted(windows):
+        if merged and start - merged[-1][1] <= WINDOW_MERGE_TOLERANCE:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def plan_backfill(db: Session, tickers: list, now: datetime = None) -> dict:
+    """
+    Gap planner. One grouped query finds the newest bar of every (symbol, timeframe) and one
+    window-function query finds holes inside the stored 1m history. Returns
+    {ticker: [(start, end), ...]} with the minimal naive-UTC fetch windows per symbol
+    (empty if up to date), or {ticker: None} when there is no 1m history to extend.
+    """
+    now = now or datetime.utcnow()
+    horizon = now - YF_1M_LOOKBACK
+
+    # 1. Newest stored bar per (symbol, timeframe) in a single round trip
+    timeframe_labels = {tf_id: label for label, tf_id in TIMEFRAME_IDS.items()}
+    latest = {}
+    for symbol, timeframe_id, last_ts in db.query(
+        MarketSymbol.symbol, MarketCandle.timeframe_id, func.max(MarketCandle.timestamp)
+    ).join(
+        MarketSymbol, MarketSymbol.id == MarketCandle.symbol_id
+    ).filter(
+        MarketSymbol.symbol.in_(tickers)
+    ).group_by(MarketSymbol.symbol, MarketCandle.timeframe_id).all():
+        latest[(symbol, timeframe_labels[timeframe_id])] = last_ts.replace(tzinfo=None)
+
+    # 2. Internal 1m holes inside the refetchable horizon
+    prev_ts = func.lag(MarketCandle.timestamp).over(
+        partition_by=MarketCandle.symbol_id,
+        order_by=MarketCandle.timestamp
+    ).label("prev_ts")
+    bars = db.query(MarketSymbol.symbol, MarketCandle.timestamp, prev_ts).join(
+        MarketSymbol, MarketSymbol.id == MarketCandle.symbol_id
+    ).filter(
+        MarketSymbol.symbol.in_(tickers),
+        MarketCandle.timeframe_id == TIMEFRAME_IDS["1m"],
+        MarketCandle.timestamp >= horizon
+    ).subquery()
+    gap = bars.c.timestamp - bars.c.prev_ts
+    holes = db.query(bars.c.symbol, bars.c.prev_ts, bars.c.timestamp).filter(gap > GAP_TOLERANCE).all()
+
+    windows = {ticker: [] for ticker in tickers}
+    for symbol, hole_start, hole_end in holes:
+        # Crypto trades 24/7, so even a long hole there is missing data, not a closure
+        if hole_end - hole_start >= MAX_INTERNAL_GAP and not is_crypto(symbol):
+            continue
+        windows[symbol].append((hole_start.replace(tzinfo=None), hole_end.replace(tzinfo=None)))
+
+    plan = {}
+    for ticker in tickers:
+        last_1m_ts = latest.get((ticker, "1m"))
+        if last_1m_ts is None:
+            plan[ticker] = None
+            continue
+
+        # 3. Tail since the newest bar (re-fetching that, possibly partial, minute)
+        if now - last_1m_ts > timedelta(minutes=1):
+            windows[ticker].append((last_1m_ts, now))
+
+        # Clamp to what yfinance can still serve, then merge into as few requests as possible
+        clamped = [(max(start, horizon), end) for start, end in windows[ticker] if end > horizon]
+        plan[ticker] = _merge_windows(clamped)
+
+    return plan
 
 
 def backfill_missing_candles(db: Session):
     """Runs on startup to catch up on data missed during downtime."""
     print("🔍 Checking for data gaps since last shutdown...")
     active_companies = db.query(Watchlist).filter(Watchlist.is_active == True).all()
-    
-    for company in active_companies:
-        # Check 1m timeframe. Higher timeframes auto-build from 1m.
-        last_1m_ts = db.query(func.max(MarketCandle.timestamp)).filter(
-            MarketCandle.symbol == company.ticker,
-            MarketCandle.timeframe == "1m"
-        ).scalar()
-
-        if not last_1m_ts:
-            initial_seed_history(company.ticker, db)
-            continue
+    plan = plan_backfill(db, [company.ticker for company in active_companies])
 
-        last_1m_ts = last_1m_ts.replace(tzinfo=None)
-        delta = datetime.utcnow() - last_1m_ts
-        minutes_offline = delta.total_seconds() / 60
-
-        if minutes_offline > 1:
-            days_offline = delta.days + 1
-            
-            # Clamp the backfill to yfinance's 7-day 1m limit
-            if days_offline > 7:
-                print(f"⚠️ {company.ticker} was offline for {days_offline} days. Capping 1m backfill to 7 days due to yfinance limits.")
-                days_offline = 7
-                
-            print(f"⏳ Backfilling {company.ticker} via 1m resample ({days_offline} days needed)...")
-            maintain_market_data(company.ticker, db, period=f"{days_offline}d")
+    # Plan in two queries, then fetch and store concurrently
+    jobs = {}
+    for ticker, windows in plan.items():
+        if windows is None:
+            jobs[ticker] = partial(initial_seed_history, ticker)
+        elif windows:
+            minutes = sum((end - start).total_seconds() for start, end in windows) / 60
+            print(f"⏳ {ticker}: {len(windows)} window(s), {minutes:.0f} minutes of 1m data to fetch.")
+            jobs[ticker] = partial(backfill_windows, ticker, windows=windows)
         else:
-            print(f"✅ {company.ticker} is completely up-to-date.")
\ No newline at end of file
+            print(f"✅ {ticker} is completely up-to-date.")
+
+    return refresh_tickers_concurrently(jobs, label="Backfill")
@@ -0,0 +1,31 @@
+# backend/app/worker.py
+# Standalone scheduler process: `python -m app.worker`
+# Run the API with SCHEDULER_MODE=worker alongside this so jobs only execute here.
+# Several worker replicas are safe: leader election lets exactly one of them fire jobs.
+import os
+import signal
+import threading
+from huggingface_hub import login
+
+from app.scheduler import start_leader_scheduler, stop_leader_scheduler
+
+
+def main():
+    hf_token = os.getenv("HF_TOKEN")
+    if hf_token: login(token=hf_token)
+
+    # Docker stops containers with SIGTERM, Ctrl+C sends SIGINT
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    scheduler, elector = start_leader_scheduler()
+    print("⏰ Worker scheduler started! Waiting for leader election.")
+    stop.wait()
+
+    print("🛑 Worker shutdown: Stopping scheduler...")
+    stop_leader_scheduler(scheduler, elector)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+# backend/tests/conftest.py
+import os
+import tempfile
+
+# app.core.config requires these; tests never reach Alpaca or Postgres
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}")
+os.environ.setdefault("ALPACA_API_KEY", "test")
+os.environ.setdefault("ALPACA_SECRET_KEY", "test")
@@ -0,0 +1,97 @@
+# backend/tests/test_backtest_engine.py
+import contextlib
+import io
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.bot import backtest_engine
+from app.services.bot.backtester import DEFAULT_PARAMS, simulate_reference
+from app.services.bot.indicators import calculate_heikin_ashi
+
+PARAM_SETS = [
+    {},
+    {'max_risk_pct': 0.3},
+    {'use_trailing': False},
+    {'trail_start_r': 0.0, 'trail_offset_r': 0.2},
+    {'rr_ratio': 5, 'max_risk_pct': 5}
+]
+
+
+def random_bars(n: int, freq: str, seed: int, vol: float) -> pd.DataFrame:
+    """Random-walk OHLC with HA columns; every third seed starts off the bar grid."""
+    rng = np.random.default_rng(seed)
+    start = '2024-01-01 00:07' if seed % 3 == 0 else '2024-01-01'
+    index = pd.date_range(start, periods=n, freq=freq, tz='UTC')
+    close = 100 * np.exp(np.cumsum(rng.normal(0, vol, n)))
+    open_ = np.r_[close[0], close[:-1]] * (1 + rng.normal(0, vol / 4, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, vol / 2, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, vol / 2, n)))
+    return calculate_heikin_ashi(pd.DataFrame(
+        {'open': open_, 'high': high, 'low': low, 'close': close, 'volume': 1.0}, index=index
+    ))
+
+
+@pytest.mark.parametrize("exit_chunk", [128, 3])
+@pytest.mark.parametrize("freq, n, vol", [('15min', 6000, 0.004), ('1min', 6000, 0.001)])
+@pytest.mark.parametrize("seed", range(6))
+def test_vectorized_matches_reference(monkeypatch, seed, freq, n, vol, exit_chunk):
+    # A tiny chunk forces exit scans across many chunk boundaries
+    monkeypatch.setattr(backtest_engine, "EXIT_CHUNK", exit_chunk)
+    df = random_bars(n, freq, seed, vol)
+    bars = backtest_engine.BarArrays(df)
+
+    for params in PARAM_SETS:
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected, expected_capital = simulate_reference(df, params)
+        trades, capital = backtest_engine.simulate_vectorized(bars, {**DEFAULT_PARAMS, **params})
+
+        assert trades == expected
+        assert capital == expected_capital
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_intrabar_on_own_bars_matches_fast_mode(seed):
+    df = random_bars(6000, '15min', seed, 0.004)
+    bars = backtest_engine.BarArrays(df)
+    sub_bars = backtest_engine.SubBarIndex(bars, df, 15)
+
+    for params in PARAM_SETS:
+        params = {**DEFAULT_PARAMS, **params}
+        assert backtest_engine.simulate_vectorized(bars, params, sub_bars) == \
+            backtest_engine.simulate_vectorized(bars, params)
+
+
+def ohlc_bars(start: str, freq: str, rows: list) -> pd.DataFrame:
+    """(open, high, low, close) rows on a regular index, with flat HA columns."""
+    index = pd.date_range(start, periods=len(rows), freq=freq, tz='UTC')
+    df = pd.DataFrame(rows, columns=['open', 'high', 'low', 'close'], index=index)
+    df['HA_Open'] = df['HA_Close'] = df['close']
+    return df
+
+
+def test_ambiguous_bar_resolves_to_tp_when_sub_bars_reach_it_first():
+    # One 15m bar touching both SL (95) and TP (110) of a long from 100
+    bars = backtest_engine.BarArrays(ohlc_bars('2024-01-01 00:15', '15min', [(100, 111, 94, 96)]))
+    sub_df = ohlc_bars('2024-01-01 00:15', '1min', [(100, 111, 100, 108), (108, 108, 94, 96)])
+    sub_bars = backtest_engine.SubBarIndex(bars, sub_df, 15)
+    levels = (0, "LONG", 100.0, 95.0, 110.0, 5.0, 2.0, False)
+
+    assert backtest_engine._find_exit(bars, *levels) == (0, 95.0)
+    assert backtest_engine._find_exit(bars, *levels, sub_bars) == (0, 110.0)
+
+
+def test_trailing_stop_survives_bar_whose_low_came_before_its_high():
+    # Bar 0's high (110) raises the trailing stop to 108 above its low (99); on 1m the low came first
+    bars = backtest_engine.BarArrays(ohlc_bars('2024-01-01 00:15', '15min', [
+        (100, 110, 99, 109),
+        (109, 111, 109.5, 110),
+        (110, 105, 100, 101)
+    ]))
+    sub_df = ohlc_bars('2024-01-01 00:15', '1min', [(100, 100.5, 99, 100), (100, 110, 109, 109)])
+    sub_bars = backtest_engine.SubBarIndex(bars, sub_df, 15)
+    levels = (0, "LONG", 100.0, 95.0, 200.0, 5.0, 2.0, True)
+
+    assert backtest_engine._find_exit(bars, *levels) == (0, 108.0)
+    # Still open after bar 0; bar 1 lifts the stop to 109, which bar 2 hits
+    assert backtest_engine._find_exit(bars, *levels, sub_bars) == (2, 109.0)
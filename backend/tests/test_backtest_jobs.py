@@ -0,0 +1,115 @@
+# backend/tests/test_backtest_jobs.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.database import Base, engine
+from app.models.backtest_job import BacktestJobRecord
+from app.services.bot import backtest_jobs as backtest_jobs_module
+from app.services.bot.backtest_jobs import BacktestJobService, cache_key
+
+START = pd.Timestamp("2024-01-01", tz="UTC")
+END = pd.Timestamp("2024-01-08", tz="UTC")
+CHART = {'points': 100, 'method': "lttb"}
+
+
+def fake_bars(symbol, timeframe_mins, start, end):
+    index = pd.date_range(start, end, freq=f"{timeframe_mins}min", inclusive="left")
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(0, 1, len(index)))
+    open_ = np.r_[close[0], close[:-1]]
+    return pd.DataFrame({'open': open_, 'high': np.maximum(open_, close) + 0.5,
+                         'low': np.minimum(open_, close) - 0.5, 'close': close, 'volume': 1.0}, index=index)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    Base.metadata.create_all(engine, tables=[BacktestJobRecord.__table__])
+    service = BacktestJobService(workers=2)
+    # Simulate on a thread so the test never spawns processes
+    pool = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(service, "_get_pool", lambda: pool)
+    yield service
+    service.shutdown()
+    pool.shutdown(wait=True)
+    Base.metadata.drop_all(engine, tables=[BacktestJobRecord.__table__])
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Records every bar load and blocks them until release is set."""
+    calls = []
+    release = threading.Event()
+
+    def load(symbol, timeframe_mins, start, end):
+        calls.append(symbol)
+        release.wait(timeout=10)
+        return fake_bars(symbol, timeframe_mins, start, end)
+
+    monkeypatch.setattr(backtest_jobs_module, "load_backtest_bars", load)
+    return calls, release
+
+
+def test_cache_key_is_stable_and_covers_every_input():
+    params = {'rr_ratio': 2.0, 'initial_capital': 10_000}
+    key = cache_key("BTC/USD", 15, START, END, params, CHART, False)
+
+    # Same inputs (in any dict order) always hash the same
+    assert key == cache_key("BTC/USD", 15, START, END, dict(reversed(list(params.items()))), dict(CHART), False)
+
+    assert key != cache_key("ETH/USD", 15, START, END, params, CHART, False)
+    assert key != cache_key("BTC/USD", 60, START, END, params, CHART, False)
+    assert key != cache_key("BTC/USD", 15, START, END + pd.Timedelta(minutes=15), params, CHART, False)
+    assert key != cache_key("BTC/USD", 15, START, END, {**params, 'rr_ratio': 3.0}, CHART, False)
+    assert key != cache_key("BTC/USD", 15, START, END, params, {**CHART, 'points': 200}, False)
+    assert key != cache_key("BTC/USD", 15, START, END, params, CHART, True)
+
+
+def test_identical_submits_share_one_in_flight_job(service, loads):
+    calls, release = loads
+    first = service.submit("btc-usd", 15, 7)
+    second = service.submit("BTC-USD", 15, 7)
+    other = service.submit("BTC-USD", 15, 7, params={'rr_ratio': 3.0})
+
+    assert second is first
+    assert other is not first
+
+    release.set()
+    for job in (first, other):
+        assert job.future.result(timeout=30).stage == "done"
+    assert len(calls) == 2
+
+
+def test_finished_result_is_served_from_cache(service, loads):
+    calls, release = loads
+    release.set()
+    first = service.submit("BTC-USD", 15, 7).future.result(timeout=30)
+    assert first.stage == "done" and not first.cached
+
+    again = service.submit("BTC-USD", 15, 7)
+    assert again.job_id != first.job_id
+    assert again.finished and again.cached
+    assert again.result == first.result
+    assert len(calls) == 1
+
+
+def test_result_stored_by_another_worker_is_reused(service, loads):
+    calls, release = loads
+    release.set()
+    first = service.submit("BTC-USD", 15, 7).future.result(timeout=30)
+    # The finished row is written just after the job resolves
+    deadline = time.time() + 10
+    while service._stored_result(first.key) is None and time.time() < deadline:
+        time.sleep(0.05)
+
+    # A second API worker has an empty in-memory cache but finds the stored row
+    other_worker = BacktestJobService(workers=1)
+    try:
+        job = other_worker.submit("BTC-USD", 15, 7).future.result(timeout=30)
+    finally:
+        other_worker.shutdown()
+    assert job.cached
+    assert job.result == first.result
+    assert len(calls) == 1
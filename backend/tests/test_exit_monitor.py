@@ -0,0 +1,81 @@
+# backend/tests/test_exit_monitor.py
+from unittest import mock
+import pytest
+
+from app.core.database import Base, SessionLocal, engine
+from app.models.trade import Trade, TradeStatus
+from app.services.bot import exit_monitor as exit_monitor_module
+from app.services.bot.exit_monitor import ExitMonitor, ReplayPriceFeed, close_trade
+
+
+@pytest.fixture
+def monitor(monkeypatch):
+    Base.metadata.create_all(engine, tables=[Trade.__table__])
+    monitor = ExitMonitor()
+    # close_trade reports back to the module-level monitor
+    monkeypatch.setattr(exit_monitor_module, "exit_monitor", monitor)
+    monkeypatch.setattr(exit_monitor_module, "broker_snapshot", mock.Mock())
+    yield monitor
+    monitor.stop()
+    Base.metadata.drop_all(engine, tables=[Trade.__table__])
+
+
+def open_trade(symbol: str, side: str, entry: float, tp: float, sl: float) -> int:
+    db = SessionLocal()
+    try:
+        # Open trades keep the TP in 'pnl' and the SL in 'pnl_percent'
+        trade = Trade(symbol=symbol, side=side, quantity=1.0, entry_price=entry,
+                      status=TradeStatus.OPEN, pnl=tp, pnl_percent=sl)
+        db.add(trade)
+        db.commit()
+        return trade.id
+    finally:
+        db.close()
+
+
+def stored_trades() -> dict:
+    db = SessionLocal()
+    try:
+        return {trade.id: trade for trade in db.query(Trade).all()}
+    finally:
+        db.close()
+
+
+def test_replay_closes_each_hit_trade_once(monitor, monkeypatch):
+    long_tp = open_trade("BTC/USD", "BUY", 100.0, tp=110.0, sl=95.0)
+    short_sl = open_trade("BTC/USD", "SELL", 100.0, tp=90.0, sl=105.0)
+    long_sl = open_trade("ETH/USD", "BUY", 10.0, tp=12.0, sl=9.0)
+    untouched = open_trade("BTC/USD", "BUY", 100.0, tp=200.0, sl=50.0)
+
+    trading_client = mock.Mock()
+    monkeypatch.setattr(exit_monitor_module, "trading_client", trading_client)
+
+    # Trading API ("BTCUSD") and data API ("ETH/USD") symbols; repeated hits after a close
+    ticks = [
+        ("BTCUSD", 101.0),
+        ("BTCUSD", 111.0),
+        ("BTCUSD", 112.0),
+        ("ETH/USD", 8.5),
+        ("ETH/USD", 8.0),
+        ("BTCUSD", 89.0)
+    ]
+    monitor.start(ReplayPriceFeed(ticks))
+    monitor._closer.shutdown(wait=True)
+
+    trades = stored_trades()
+    orders = [call.args[0] for call in trading_client.submit_order.call_args_list]
+    assert sorted(order.symbol for order in orders) == ["BTCUSD", "BTCUSD", "ETHUSD"]
+
+    assert trades[long_tp].status == TradeStatus.CLOSED
+    assert trades[long_tp].exit_price == 111.0
+    assert trades[long_tp].pnl == pytest.approx(11.0)
+    assert trades[short_sl].status == TradeStatus.CLOSED
+    assert trades[short_sl].exit_price == 111.0
+    assert trades[short_sl].pnl == pytest.approx(-11.0)
+    assert trades[long_sl].status == TradeStatus.CLOSED
+    assert trades[long_sl].exit_price == 8.5
+    assert trades[untouched].status == TradeStatus.OPEN
+
+    # The bar-close safety net finds nothing left to close
+    assert not close_trade(long_tp, 111.0)
+    assert trading_client.submit_order.call_count == 3
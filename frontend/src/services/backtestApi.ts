@@ -1,6 +1,17 @@
 // src/services/backtestApi.ts
 import { API_URL } from '../config';
 
+export interface MonteCarloResult {
+  method: 'bootstrap' | 'shuffle';
+  paths: number;
+  trades: number;
+  total_return_pct: Record<string, number>;
+  max_drawdown_pct: Record<string, number>;
+  probability_of_loss: number;
+  ruin_loss_pct: number;
+  risk_of_ruin: number;
+}
+
 export interface BacktestResult {
   ticker: string;
   summary: {
@@ -12,6 +23,7 @@ export interface BacktestResult {
   };
   trades: any[];
   chart_data: { time: string; price: number }[];
+  monte_carlo: MonteCarloResult | null;
 }
 
 export const backtestApi = {